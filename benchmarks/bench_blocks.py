@@ -0,0 +1,48 @@
+import random
+import re
+import textwrap
+import timeit
+from benchmarks.corpus import inline_sentence
+from src.blocknode import BlockType, scan_blocks
+
+
+def legacy_scan(markdown): # The previous markdown_to_blocks + block_to_block_type pipeline.
+    blocks = re.split(r'\n\s*\n', markdown.strip())
+    blocks = [textwrap.dedent(block).strip() for block in blocks if block.strip()]
+    result = []
+    for block in blocks:
+        lines = block.split("\n")
+        if block.startswith("```") and block.endswith("```"):
+            block_type = BlockType.CODE
+        elif all(line.strip().startswith(">") for line in lines if line.strip()):
+            block_type = BlockType.BLOCKQUOTE
+        elif all(re.match(r"-\s", line) for line in lines):
+            block_type = BlockType.UNORDERED_LIST
+        elif all(re.match(rf"{i+1}\.\s", line) for i, line in enumerate(lines)):
+            block_type = BlockType.ORDERED_LIST
+        elif re.match(r"^#{1,6} ", lines[0]):
+            block_type = BlockType.HEADING
+        else:
+            block_type = BlockType.PARAGRAPH
+        result.append((block_type, block.splitlines()))
+    return result
+
+
+def list_document(items, seed=0): # One page holding an ordered and an unordered list of `items` entries each.
+    rng = random.Random(seed)
+    ordered = "\n".join(f"{i + 1}. {inline_sentence(rng, 6)}" for i in range(items))
+    unordered = "\n".join(f"- {inline_sentence(rng, 6)}" for _ in range(items))
+    return f"# Lists\n\n{ordered}\n\n{unordered}\n\nA closing paragraph.\n"
+
+
+def main():
+    for items in (1000, 5000, 20000):
+        markdown = list_document(items)
+        assert [t for t, _ in scan_blocks(markdown)] == [t for t, _ in legacy_scan(markdown)]
+        old = min(timeit.repeat(lambda: legacy_scan(markdown), number=3, repeat=5)) / 3
+        new = min(timeit.repeat(lambda: scan_blocks(markdown), number=3, repeat=5)) / 3
+        print(f"{items:>6} list items: legacy {old * 1000:8.2f} ms  line scanner {new * 1000:8.2f} ms  speedup {old / new:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import random
+import timeit
+from src.nodes import TextNode, TextType
+from src.splits import split_nodes_image, split_nodes_link, split_nodes_delimiter, tokenize_inline
+
+
+def chained_split(text): # The previous text_to_children pipeline: six passes, six node lists.
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
+
+
+def long_paragraph(words, seed=0): # Build a paragraph with a realistic sprinkling of inline markup.
+    rng = random.Random(seed)
+    pieces = []
+    for i in range(words):
+        roll = rng.random()
+        if roll < 0.04:
+            pieces.append(f"**bold {i}**")
+        elif roll < 0.07:
+            pieces.append(f"_italic {i}_")
+        elif roll < 0.09:
+            pieces.append(f"`code{i}`")
+        elif roll < 0.10:
+            pieces.append(f"[link {i}](/page/{i})")
+        elif roll < 0.105:
+            pieces.append(f"![image {i}](/images/{i}.png)")
+        else:
+            pieces.append(f"word{i}")
+    return " ".join(pieces)
+
+
+def main():
+    for words in (50, 500, 5000):
+        text = long_paragraph(words)
+        assert tokenize_inline(text) == chained_split(text)
+        number = max(1, 20000 // words)
+        old = min(timeit.repeat(lambda: chained_split(text), number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: tokenize_inline(text), number=number, repeat=5)) / number
+        print(f"{words:>5} words: chained {old * 1e6:9.1f} us  single-pass {new * 1e6:9.1f} us  speedup {old / new:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import random
+import timeit
+import tracemalloc
+from benchmarks.corpus import generate_page
+from src.converts import markdown_to_html_node
+
+
+def large_document(size=20): # A long mixed page, the shape that dominates node memory.
+    return generate_page(random.Random(0), "mixed", size)
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+def main():
+    markdown = large_document()
+    tracemalloc.start()
+    root = markdown_to_html_node(markdown)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = count_nodes(root)
+    seconds = min(timeit.repeat(lambda: markdown_to_html_node(markdown), number=3, repeat=5)) / 3
+    print(f"{len(markdown) / 1e6:.2f} MB markdown, {nodes} HTML nodes")
+    print(f"tree memory {current / 1e6:.2f} MB ({current / nodes:.0f} B/node), peak {peak / 1e6:.2f} MB")
+    print(f"markdown_to_html_node {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import random
+import timeit
+from benchmarks.corpus import generate_page
+from src.converts import markdown_to_html_node
+from src.nodes import HTMLNode, LeafNode
+
+
+def legacy_to_html(node): # The previous unescaped serializer: f-strings and a void tag set built per leaf.
+    if isinstance(node, LeafNode):
+        void_tags = {"img", "br", "hr", "input", "meta", "link"}
+        props = "".join([f' {key}="{value}"' for key, value in node.props.items()]) if node.props else ""
+        if node.tag in void_tags:
+            return f"<{node.tag}{props} />"
+        if node.value is None:
+            raise ValueError("All leaf nodes must have a value")
+        if node.tag is None:
+            return node.value
+        return f"<{node.tag}{props}>{node.value}</{node.tag}>"
+    if node.tag is None:
+        raise ValueError("All parent nodes must have a tag")
+    if not node.children:
+        raise ValueError("All parent nodes must have children")
+    for child in node.children:
+        if not isinstance(child, HTMLNode):
+            raise TypeError("All children must be instances of HTMLNode")
+    props = "".join([f' {key}="{value}"' for key, value in node.props.items()]) if node.props else ""
+    children_html = "".join([legacy_to_html(child) for child in node.children])
+    return f"<{node.tag}{props}>{children_html}</{node.tag}>"
+
+
+def main():
+    for shape in ("mixed", "inline", "lists"):
+        root = markdown_to_html_node(generate_page(random.Random(0), shape, 20))
+        legacy = min(timeit.repeat(lambda: legacy_to_html(root), number=5, repeat=5)) / 5
+        escaped = min(timeit.repeat(root.to_html, number=5, repeat=5)) / 5
+        print(f"{shape:>8}: unescaped {legacy * 1000:.2f} ms, escaping {escaped * 1000:.2f} ms "
+              f"({legacy / escaped:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each case is a command line run in a scratch site; "eager imports" loads every subsystem
+# up front, which is what every invocation paid before the CLI imported them lazily.
+CASES = [
+    ("python only", [sys.executable, "-c", "pass"]),
+    ("eager imports", [sys.executable, "-c", "import src.build, src.compress, src.feeds, src.linkcheck, src.search, src.serve, src.shards"]),
+    ("--help", [sys.executable, "-m", "src.main", "--help"]),
+    ("clean", [sys.executable, "-m", "src.main", "clean"]),
+    ("check", [sys.executable, "-m", "src.main", "check"]),
+    ("build (1 page)", [sys.executable, "-m", "src.main", "build"]),
+    ("build, nothing changed", [sys.executable, "-m", "src.main", "build"]),
+]
+
+
+def make_site(root): # A one-page site, the size of a watch or CI run on a tiny subtree.
+    os.makedirs(os.path.join(root, "content"))
+    os.makedirs(os.path.join(root, "static"))
+    with open(os.path.join(root, "content", "index.md"), "w") as f:
+        f.write("# Home\n\nHello **world**, see [the docs](/docs).\n")
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write("<title>{{ Title }}</title>{{ Content }}")
+
+
+def time_command(command, cwd, repeat): # Median wall time of a command, in milliseconds.
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(repeat=15):
+    root = tempfile.mkdtemp(prefix="ssg-startup-")
+    try:
+        make_site(root)
+        for name, command in CASES:
+            if name == "build (1 page)":
+                # Measure a first build every time: start from an empty output and cache.
+                samples = []
+                for _ in range(repeat):
+                    shutil.rmtree(os.path.join(root, "docs"), ignore_errors=True)
+                    shutil.rmtree(os.path.join(root, ".cache"), ignore_errors=True)
+                    samples.append(time_command(command, root, 1))
+                median = statistics.median(samples)
+            else:
+                median = time_command(command, root, repeat)
+            print(f"{name:>24}: {median:7.1f} ms")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time CLI startup for common commands")
+    parser.add_argument("--repeat", type=int, default=15, help="runs per command; the median is reported")
+    main(parser.parse_args().repeat)
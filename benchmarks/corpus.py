@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+
+SHAPES = ("mixed", "lists", "paragraphs", "inline", "code")
+
+
+def inline_sentence(rng, words, markup=0.1): # A sentence with roughly `markup` of its words wrapped in inline markup.
+    pieces = []
+    for i in range(words):
+        word = rng.choice(("elf", "ring", "mountain", "river", "hobbit", "wizard", "shadow", "road"))
+        if rng.random() < markup:
+            kind = rng.randrange(5)
+            if kind == 0:
+                word = f"**{word}**"
+            elif kind == 1:
+                word = f"_{word}_"
+            elif kind == 2:
+                word = f"`{word}`"
+            elif kind == 3:
+                word = f"[{word}](/blog/{word}{i})"
+            else:
+                word = f"![{word}](/images/{word}.png)"
+        pieces.append(word)
+    return " ".join(pieces) + "."
+
+
+def paragraph(rng, sentences, words=14, markup=0.1):
+    return " ".join(inline_sentence(rng, words, markup) for _ in range(sentences))
+
+
+def unordered_list(rng, items):
+    return "\n".join(f"- {inline_sentence(rng, 8)}" for _ in range(items))
+
+
+def ordered_list(rng, items):
+    return "\n".join(f"{i + 1}. {inline_sentence(rng, 8)}" for i in range(items))
+
+
+def code_block(rng, lines):
+    body = "\n".join(f"    value_{i} = compute({rng.randrange(1000)})" for i in range(lines))
+    return f"```\ndef generated():\n{body}\n```"
+
+
+def generate_page(rng, shape="mixed", size=1): # Markdown for one page; size scales the number of blocks.
+    blocks = [f"# Page {rng.randrange(10 ** 6)}"]
+    for i in range(20 * size):
+        blocks.append(f"## Section {i}")
+        if shape == "lists":
+            blocks.append(unordered_list(rng, 50))
+            blocks.append(ordered_list(rng, 50))
+        elif shape == "paragraphs":
+            blocks.append(paragraph(rng, 40, markup=0.02))
+        elif shape == "inline":
+            blocks.append(paragraph(rng, 8, markup=0.5))
+        elif shape == "code":
+            blocks.append(code_block(rng, 200))
+        else:
+            blocks.append(paragraph(rng, 4))
+            blocks.append(unordered_list(rng, 5))
+            blocks.append(f"> {inline_sentence(rng, 12)}")
+            if i % 4 == 0:
+                blocks.append(code_block(rng, 10))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(content_dir, pages=100, shape="mixed", size=1, seed=0, fanout=50):
+    # Write a deterministic synthetic content tree, `fanout` pages per directory.
+    rng = random.Random(seed)
+    paths = []
+    for n in range(pages):
+        path = os.path.join(content_dir, f"section{n // fanout}", f"page{n}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(generate_page(rng, shape, size))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus.")
+    parser.add_argument("content_dir")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--size", type=int, default=1, help="multiplier for blocks per page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_corpus(args.content_dir, args.pages, args.shape, args.size, args.seed)
+    print(f"Wrote {len(paths)} pages to {args.content_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from benchmarks.corpus import SHAPES, generate_corpus
+from src.build import build_site
+from src.converts import markdown_to_blocks, markdown_to_html_node, text_to_children
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def best_of(func, repeat): # Fastest wall time of `repeat` runs.
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def inline_runs(markdown): # The inline text of every non-code block line, with block markers stripped.
+    runs = []
+    for block in markdown_to_blocks(markdown):
+        if block.startswith("```"):
+            continue
+        for line in block.split("\n"):
+            text = line.lstrip("#>- ").lstrip("0123456789").lstrip(". ")
+            if text:
+                runs.append(text)
+    return runs
+
+
+def run_suite(pages=50, shape="mixed", size=1, repeat=3, workers=1): # Run every benchmark on one corpus and return results by name.
+    root = tempfile.mkdtemp(prefix="ssg-bench-")
+    try:
+        content_dir = os.path.join(root, "content")
+        paths = generate_corpus(content_dir, pages, shape, size)
+        documents = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+        source_bytes = sum(len(doc.encode()) for doc in documents)
+        inline_texts = [text for doc in documents for text in inline_runs(doc)]
+        inline_bytes = sum(len(text.encode()) for text in inline_texts)
+        trees = [markdown_to_html_node(doc) for doc in documents]
+        html_bytes = sum(len(tree.to_html().encode()) for tree in trees)
+
+        template = os.path.join(root, "template.html")
+        with open(template, "w") as f:
+            f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+
+        def full_build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_site(content_dir, template, os.path.join(root, "docs"), "/",
+                           manifest_path=os.path.join(root, "manifest.json"), force=True, workers=workers)
+
+        cases = {
+            "markdown_to_html_node": (lambda: [markdown_to_html_node(doc) for doc in documents], source_bytes),
+            "text_to_children": (lambda: [text_to_children(text) for text in inline_texts], inline_bytes),
+            "to_html": (lambda: [tree.to_html() for tree in trees], html_bytes),
+            "build": (full_build, source_bytes),
+        }
+        results = {}
+        for name, (func, nbytes) in cases.items():
+            seconds = best_of(func, repeat)
+            results[name] = {
+                "seconds": seconds,
+                "pages_per_s": pages / seconds,
+                "mb_per_s": nbytes / seconds / 1e6,
+            }
+        return results
+    finally:
+        shutil.rmtree(root)
+
+
+def latest_result(config): # Path of the most recently saved result file with the same config, if any.
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), reverse=True):
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if saved.get("config") == config:
+            return path
+    return None
+
+
+def format_results(results, baseline=None):
+    lines = [f"{'benchmark':<24}{'seconds':>10}{'pages/s':>12}{'MB/s':>10}{'vs base':>10}"]
+    for name, result in results.items():
+        delta = ""
+        if baseline and name in baseline:
+            delta = f"{(baseline[name]['seconds'] / result['seconds'] - 1) * 100:+.1f}%"
+        lines.append(f"{name:<24}{result['seconds']:>10.4f}{result['pages_per_s']:>12.1f}{result['mb_per_s']:>10.2f}{delta:>10}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing, rendering and full builds on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--shape", choices=SHAPES, default="mixed")
+    parser.add_argument("--size", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="workers for the full build benchmark")
+    parser.add_argument("--baseline", help="result file to compare against (default: latest saved run)")
+    parser.add_argument("--no-save", action="store_true", help="don't save this run to benchmarks/results/")
+    args = parser.parse_args()
+
+    results = run_suite(args.pages, args.shape, args.size, args.repeat, args.jobs)
+    config = vars(args) | {"baseline": None, "no_save": False}
+    baseline_path = args.baseline or latest_result(config)
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            saved = json.load(f)
+        if saved["config"] == config:
+            baseline = saved["results"]
+        else:
+            print(f"Not comparing with {baseline_path}: different configuration")
+    print(format_results(results, baseline))
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+        with open(path, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=1)
+        print(f"Saved results to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1 @@
-python3 -m src.main "/Static-Site-Generator/"
\ No newline at end of file
+python3 -m src.main build "/Static-Site-Generator/"
\ No newline at end of file
@@ -0,0 +1,157 @@
+import os
+import re
+import shutil
+from src.manifest import hash_file, load_manifest, save_manifest, MANIFEST_VERSION
+
+DEFAULT_ASSET_MANIFEST_PATH = os.path.join(".cache", "assets.json")
+ASSET_MODES = ("copy", "hardlink", "reflink")
+FICLONE = 0x40049409 # Linux ioctl that shares extents between files on btrfs/xfs
+FINGERPRINT_LENGTH = 10 # Hex digits of the content hash put in fingerprinted names
+BASEPATH_URL_PATTERN = re.compile(r"(\{\{\s*BasePath\s*\}\})([^\s\"'<>()]+)")
+
+
+def empty_asset_manifest():
+    return {"version": MANIFEST_VERSION, "assets": {}}
+
+
+def collect_assets(static_dir): # Return sorted paths of every file under static_dir, relative to it.
+    assets = []
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(files):
+            assets.append(os.path.relpath(os.path.join(root, name), static_dir))
+    return assets
+
+
+def is_up_to_date(src_stat, dest, src, checksum=False): # True when dest already holds the same bytes as src.
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != src_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    return checksum and hash_file(src) == hash_file(dest)
+
+
+def _reflink(src, dest):
+    import fcntl
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dest)
+
+
+def place_file(src, dest, mode="copy"): # Put src at dest by hardlink, reflink or copy; returns the method actually used.
+    if os.path.lexists(dest):
+        os.remove(dest)
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass # Different filesystem or links unsupported: fall back to copying
+    elif mode == "reflink":
+        try:
+            _reflink(src, dest)
+            return "reflink"
+        except (OSError, ImportError):
+            if os.path.exists(dest):
+                os.remove(dest)
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def fingerprinted_name(rel_path, digest): # "images/a.png" -> "images/a.<hash>.png"
+    root, extension = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def hash_assets(static_dir, rel_paths, previous, workers=4):
+    # sha256 of each asset, reusing the hash recorded at the last sync when size and mtime are unchanged.
+    # Hashing runs on threads; hashlib releases the GIL while it digests large reads.
+    digests = {}
+    stale = []
+    for rel_path in rel_paths:
+        st = os.stat(os.path.join(static_dir, rel_path))
+        old = previous.get(rel_path)
+        if old and old.get("hash") and old["size"] == st.st_size and old["mtime"] == st.st_mtime_ns:
+            digests[rel_path] = old["hash"]
+        else:
+            stale.append(rel_path)
+    if stale:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            hashed = pool.map(hash_file, [os.path.join(static_dir, rel_path) for rel_path in stale])
+            digests.update(zip(stale, hashed))
+    return digests
+
+
+def sync_assets(static_dir, dest_dir, manifest_path=DEFAULT_ASSET_MANIFEST_PATH, mode="copy", checksum=False,
+                fingerprint=False, workers=4):
+    # Copy new or changed files from static_dir into dest_dir, skip identical ones and remove
+    # outputs of assets that were deleted since the last sync. With fingerprint=True every file is
+    # placed under a content-addressed name, and stats["urls"] maps original to fingerprinted paths.
+    if mode not in ASSET_MODES:
+        raise ValueError(f"Unknown asset mode: {mode}")
+    previous = load_manifest(manifest_path, empty=empty_asset_manifest)["assets"]
+    current = {}
+    urls = {}
+    stats = {"copy": 0, "hardlink": 0, "reflink": 0, "skipped": 0, "removed": 0, "bytes_copied": 0, "bytes_skipped": 0,
+             "urls": urls}
+    rel_paths = collect_assets(static_dir)
+    digests = hash_assets(static_dir, rel_paths, previous, workers) if fingerprint else {}
+
+    for rel_path in rel_paths:
+        src = os.path.join(static_dir, rel_path)
+        dest_rel = rel_path
+        st = os.stat(src)
+        current[rel_path] = {"size": st.st_size, "mtime": st.st_mtime_ns}
+        if fingerprint:
+            dest_rel = fingerprinted_name(rel_path, digests[rel_path])
+            urls[rel_path.replace(os.sep, "/")] = dest_rel.replace(os.sep, "/")
+            current[rel_path].update({"hash": digests[rel_path], "dest": dest_rel})
+        dest = os.path.join(dest_dir, dest_rel)
+        if is_up_to_date(st, dest, src, checksum):
+            stats["skipped"] += 1
+            stats["bytes_skipped"] += st.st_size
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        method = place_file(src, dest, mode)
+        stats[method] += 1
+        stats["bytes_copied"] += st.st_size
+
+    live = {entry.get("dest", rel_path) for rel_path, entry in current.items()}
+    for rel_path, entry in previous.items():
+        dest_rel = entry.get("dest", rel_path)
+        if dest_rel not in live:
+            dest = os.path.join(dest_dir, dest_rel)
+            if os.path.exists(dest):
+                os.remove(dest)
+                stats["removed"] += 1
+
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "assets": current})
+    placed = stats["copy"] + stats["hardlink"] + stats["reflink"]
+    print(f"Synced assets: {placed} placed ({stats['bytes_copied']} bytes), "
+          f"{stats['skipped']} skipped ({stats['bytes_skipped']} bytes), {stats['removed']} removed")
+    return stats
+
+
+def fingerprint_url(url, urls): # url with its static file path swapped for the fingerprinted one, if urls has it.
+    if not urls:
+        return url
+    end = len(url)
+    for mark in "?#":
+        index = url.find(mark)
+        if index != -1:
+            end = min(end, index)
+    path = url[:end]
+    stripped = path.lstrip("/")
+    target = urls.get(stripped)
+    if target is None:
+        return url
+    return path[:len(path) - len(stripped)] + target + url[end:]
+
+
+def fingerprint_template(source, urls): # Rewrite "{{ BasePath }}/file" references in a template source to fingerprinted names.
+    return BASEPATH_URL_PATTERN.sub(lambda m: m.group(1) + fingerprint_url(m.group(2), urls), source)
@@ -1,5 +1,4 @@
 from enum import Enum
-import re
 
 
 class BlockType(Enum): # Enum to represent different types of blocks in markdown
@@ -14,21 +13,67 @@ class BlockType(Enum): # Enum to represent different types of blocks in markdown
 
 
 def block_to_block_type(block: str) -> BlockType: # Function to determine the type of a markdown block
-    lines = block.split("\n")
+    return classify_lines(block.split("\n"))
 
-    if block.startswith("```") and block.endswith("```"):
+
+def classify_lines(lines) -> BlockType: # Classify a block from its lines; every check stops at the first line that fails it.
+    if lines[0].startswith("```") and lines[-1].endswith("```"):
         return BlockType.CODE
 
     if all(line.strip().startswith(">") for line in lines if line.strip()):
         return BlockType.BLOCKQUOTE
 
-    if all(re.match(r"-\s", line) for line in lines):
+    if all(len(line) > 1 and line[0] == "-" and line[1].isspace() for line in lines):
         return BlockType.UNORDERED_LIST
 
-    if all(re.match(rf"{i+1}\.\s", line) for i, line in enumerate(lines)):
+    if all(is_ordered_item(line, i + 1) for i, line in enumerate(lines)):
         return BlockType.ORDERED_LIST
 
-    if re.match(r"^#{1,6} ", lines[0]):
+    first_line = lines[0]
+    level = len(first_line) - len(first_line.lstrip("#"))
+    if 1 <= level <= 6 and first_line[level:level + 1] == " ":
         return BlockType.HEADING
 
     return BlockType.PARAGRAPH
+
+
+def is_ordered_item(line, number): # True if line starts with "<number>." followed by whitespace.
+    prefix = str(number)
+    end = len(prefix)
+    return line.startswith(prefix) and line[end:end + 1] == "." and line[end + 1:end + 2].isspace()
+
+
+def _finish_block(lines): # Dedent a block's lines and strip the block's outer whitespace, like dedent(block).strip().
+    for line in lines:
+        if line[0] in " \t":
+            import textwrap # Only indented blocks need it
+            lines = textwrap.dedent("\n".join(lines)).split("\n")
+            break
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
+
+
+def split_block_lines(markdown): # Group a document's lines into blocks separated by whitespace-only lines.
+    return list(iter_block_lines(markdown.strip().split("\n")))
+
+
+def iter_block_lines(lines): # Lazily group any iterable of lines into blocks; only the current block is held in memory.
+    current = []
+    first = True
+    for line in lines:
+        if not line or line.isspace():
+            if current:
+                yield _finish_block(current)
+                current = []
+        else:
+            if first:
+                line = line.lstrip() # What markdown.strip() does to the document's first line
+                first = False
+            current.append(line)
+    if current:
+        yield _finish_block(current)
+
+
+def scan_blocks(markdown): # Split and classify a document in one pass over its lines, as (BlockType, lines) pairs.
+    return [(classify_lines(lines), lines) for lines in split_block_lines(markdown)]
@@ -0,0 +1,294 @@
+import hashlib
+import itertools
+import os
+from collections import deque
+from src.converts import generate_page, set_asset_urls
+from src.template import Template, load_template
+from src import profiling
+from src.writer import OutputWriter, PageBuffer
+from src.manifest import hash_file, load_manifest, save_manifest, empty_manifest, MANIFEST_VERSION, DEFAULT_MANIFEST_PATH
+from src.depgraph import page_dependencies, asset_stamp, changed_assets, dependents
+from src.progress import Progress
+from src.scan import scan_pages
+
+WORKER_CACHE_BYTES = 64 * 2 ** 20 # Block cache entries shipped to pool workers, in total; split between them
+_worker_state = {} # Template, basepath, block cache and writer shared with every page rendered by this process.
+
+
+def collect_pages(content_dir, dest_dir): # Walk the content tree and return sorted (source, destination) pairs for every markdown page.
+    return [(src, dest) for src, dest, _ in scan_pages(content_dir, dest_dir)]
+
+
+def source_entry(src, dest, old_entry, st=None):
+    # Build the manifest entry for a source, only re-hashing it when size or mtime changed.
+    # st can be passed in from the directory scan to save a stat call.
+    if st is None:
+        st = os.stat(src)
+    if old_entry and old_entry.get("size") == st.st_size and old_entry.get("mtime") == st.st_mtime_ns:
+        digest = old_entry["hash"]
+    else:
+        digest = hash_file(src)
+    return {"hash": digest, "dest": dest, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def _init_worker(template, basepath, cache=None, writer=None, collect_terms=False, asset_urls=None):
+    set_asset_urls(asset_urls)
+    _worker_state["template"] = template
+    _worker_state["basepath"] = basepath
+    _worker_state["cache"] = cache
+    _worker_state["writer"] = writer
+    _worker_state["collect_terms"] = collect_terms
+
+
+def _render_page(src, dest, previous_key=None):
+    return generate_page(src, None, dest, _worker_state["basepath"], template=_worker_state["template"],
+                         cache=_worker_state["cache"], writer=_worker_state["writer"],
+                         collect_terms=_worker_state["collect_terms"], previous_key=previous_key)
+
+
+def _render_job(job):
+    # Render one (source, destination[, previous output key]) job into (source, error, info);
+    # errors are captured instead of raised.
+    src, dest = job[0], job[1]
+    previous_key = job[2] if len(job) > 2 else None
+    profiler = profiling.active()
+    try:
+        if profiler is None:
+            info = _render_page(src, dest, previous_key)
+        else:
+            with profiler.page(src, dest):
+                info = _render_page(src, dest, previous_key)
+    except Exception as e:
+        return (src, f"{type(e).__name__}: {e}", None)
+    return (src, None, info)
+
+
+def _render_chunk_in_worker(chunk):
+    # Pool variant: render a chunk of jobs and ship results, new block cache entries and
+    # (when the parent has an OutputWriter) the rendered pages back to the parent.
+    results = [_render_job(job) for job in chunk]
+    cache = _worker_state["cache"]
+    writer = _worker_state["writer"]
+    return results, cache.drain() if cache is not None else None, writer.drain() if writer is not None else None
+
+
+def _chunked(jobs, size): # Lazily split an iterable of jobs into lists of at most size jobs.
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def resolve_workers(workers): # 0 or None means one worker per CPU.
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def render_jobs(jobs, template, basepath="/", workers=1, cache=None, writer=None, collect_terms=False, asset_urls=None):
+    # Render jobs on a process pool (or serially when workers == 1) and return (source, error, info) per job, in order.
+    return list(iter_render_jobs(jobs, len(jobs), template, basepath, workers, cache, writer, collect_terms, asset_urls))
+
+
+def iter_render_jobs(jobs, count, template, basepath="/", workers=1, cache=None, writer=None, collect_terms=False,
+                     asset_urls=None):
+    # Like render_jobs, but jobs can be any iterable of count jobs and results are yielded as they arrive,
+    # so neither the jobs nor the results of a large build have to be held at once.
+    workers = resolve_workers(workers)
+    remaining = iter(jobs)
+    if profiling.active() is not None and workers > 1:
+        print("Profiling is enabled, rendering serially so every stage is measured in this process")
+        workers = 1
+
+    if workers > 1 and count > 1:
+        from concurrent.futures import ProcessPoolExecutor # Imported here: serial builds never need it
+        from concurrent.futures.process import BrokenProcessPool
+        chunks = _chunked(remaining, max(1, min(64, count // (workers * 4))))
+        # Workers get only the most recently used part of the block cache rather than a copy of all of it;
+        # the entries they add come back through drain() and are merged here.
+        worker_cache = cache.subset(WORKER_CACHE_BYTES // workers) if cache is not None else None
+        if worker_cache is not None:
+            worker_cache.track_added = True
+        initargs = (template, basepath, worker_cache, PageBuffer() if writer is not None else None, collect_terms,
+                    asset_urls)
+        progress = Progress("Rendered", count)
+        pending = deque() # [chunk, future], oldest first; at most workers * 2 in flight
+
+        def finish_oldest(): # Wait for the oldest chunk and fold its cache entries and pages into this process.
+            chunk_results, cache_delta, pages = pending[0][1].result()
+            pending.popleft()
+            if cache_delta is not None:
+                cache.merge(cache_delta)
+            for path, data in pages or ():
+                writer.submit(path, data)
+            progress.update(len(chunk_results))
+            return chunk_results
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                for chunk in chunks:
+                    # Queue the chunk before submitting it, so a submit that fails on a broken pool doesn't lose it.
+                    pending.append([chunk, None])
+                    pending[-1][1] = pool.submit(_render_chunk_in_worker, chunk)
+                    if len(pending) >= workers * 2:
+                        yield from finish_oldest()
+                while pending:
+                    yield from finish_oldest()
+        except (OSError, BrokenProcessPool) as e:
+            # Chunks are consumed in order, so what's left is the pending chunks followed by the unsplit jobs.
+            print(f"Process pool unavailable ({e}), rendering the remaining pages serially")
+            remaining = itertools.chain([job for chunk, _ in pending for job in chunk], itertools.chain.from_iterable(chunks))
+        progress.close()
+
+    _init_worker(template, basepath, cache, writer, collect_terms, asset_urls)
+    progress = Progress("Rendered", count)
+    for job in remaining:
+        yield _render_job(job)
+        progress.update()
+    progress.close()
+
+
+def report_failures(results): # Print failed jobs and return them as (source, error) pairs.
+    failures = [(src, error) for src, error, _ in results if error is not None]
+    for src, error in failures:
+        print(f"Failed to render {src}: {error}")
+    return failures
+
+
+def build_site(content_dir, template_path, dest_dir, basepath="/", manifest_path=DEFAULT_MANIFEST_PATH, force=False, workers=1,
+               block_cache=None, static_dir=None, writer_threads=0, fsync=False, collect_terms=False, asset_urls=None,
+               shard=None, shard_strategy="hash", indexes=()):
+    # Render only the pages whose source changed since the last build, plus the pages whose
+    # dependencies (template, referenced assets, linked pages appearing or disappearing) changed,
+    # and delete outputs whose sources were removed. force=True re-renders everything.
+    # asset_urls (from sync_assets with fingerprint=True) rewrites asset URLs in the template and pages.
+    # shard=(index, count) builds only that shard's pages (see src/shards.py).
+    # indexes names the indexes fed from stats["pages"] after this build (e.g. "search"); pages whose last
+    # render didn't feed one of them are rendered again, so the index sees every page.
+    manifest = empty_manifest() if force else load_manifest(manifest_path)
+    template = load_template(template_path)
+    if asset_urls:
+        from src.assets import fingerprint_template
+        # Hash the rewritten template, so a changed asset it references re-renders every page; the
+        # prefix makes turning fingerprinting on or off re-render everything too.
+        template = Template(fingerprint_template(template.source, asset_urls))
+        template_hash = hashlib.sha256(b"fingerprinted\0" + template.source.encode()).hexdigest()
+    else:
+        template_hash = hash_file(template_path)
+    full = force or manifest["basepath"] != basepath
+
+    old_pages = manifest["pages"]
+    new_pages = {}
+    dirty = set()
+    unindexed = set()
+
+    # Sources are scanned lazily; only sharded builds need the whole list up front to assign shards.
+    if shard is None:
+        scanned = ((src, dest, dir_entry.stat()) for src, dest, dir_entry in scan_pages(content_dir, dest_dir))
+    else:
+        from src.shards import select_shard
+        shard_jobs = select_shard(collect_pages(content_dir, dest_dir), content_dir, shard, shard_strategy)
+        scanned = [(src, dest, None) for src, dest in shard_jobs]
+    progress = Progress("Scanned sources")
+    for src, dest, st in scanned:
+        progress.update()
+        old_entry = old_pages.get(src)
+        entry = source_entry(src, dest, old_entry, st)
+        if old_entry is not None and "deps" in old_entry:
+            # Every page uses this build's template, even if the last build rendered it from another path.
+            entry["deps"] = dict(old_entry["deps"], template=template_path)
+            entry["refs"] = old_entry["refs"]
+            entry["output"] = old_entry.get("output")
+            entry["indexed"] = old_entry.get("indexed", [])
+        new_pages[src] = entry
+        if full or old_entry is None or old_entry["hash"] != entry["hash"] \
+                or old_entry["dest"] != dest or not os.path.exists(dest):
+            dirty.add(src)
+        if any(name not in entry.get("indexed", ()) for name in indexes):
+            unindexed.add(src)
+    progress.close()
+
+    touched = changed_assets(manifest.get("assets", {}))
+    if manifest["template"] != template_hash:
+        touched.add(template_path)
+    touched.update(set(new_pages).symmetric_difference(old_pages))
+    dirty.update(dependents(new_pages, touched))
+    dirty.update(unindexed)
+
+    live_dests = {entry["dest"] for entry in new_pages.values()}
+    removed = 0
+    for src, entry in old_pages.items():
+        if src in new_pages or entry["dest"] in live_dests:
+            continue
+        if os.path.exists(entry["dest"]):
+            os.remove(entry["dest"])
+            removed += 1
+
+    # Each job carries the page's last output key, so pages whose HTML would come out identical are skipped.
+    # Pages missing from an index get no key: they must render to produce the info the index needs.
+    # Jobs are generated and results folded into the manifest one at a time, so a full build of a huge
+    # site never holds every job or every page's rendered info at once.
+    jobs = ((src, entry["dest"], None if full or src in unindexed else entry.get("output"))
+            for src, entry in new_pages.items() if src in dirty)
+
+    # writer_threads > 0 moves output I/O onto an OutputWriter; identical outputs are not rewritten.
+    writer = OutputWriter(threads=writer_threads, fsync=fsync) if writer_threads > 0 else None
+    failures = []
+    pages = {}
+    unchanged = 0
+    try:
+        for src, error, info in iter_render_jobs(jobs, len(dirty), template, basepath, workers, block_cache, writer,
+                                                 collect_terms, asset_urls):
+            if error is not None:
+                failures.append((src, error))
+                continue
+            if info.get("unchanged"):
+                # Same output as last time: the deps and refs copied from the old entry still hold.
+                unchanged += 1
+                continue
+            entry = new_pages[src]
+            entry["output"] = info.get("output_key")
+            entry["indexed"] = sorted(indexes)
+            deps = page_dependencies(info["refs"], content_dir, static_dir)
+            deps["template"] = template_path
+            entry["deps"] = deps
+            entry["refs"] = [list(ref) for ref in info["refs"]]
+            # Only what the search index and page index read; refs already live in the manifest entry.
+            pages[src] = {"title": info["title"], "meta": info["meta"], "terms": info["terms"], "dest": entry["dest"]}
+    finally:
+        write_errors = writer.close() if writer is not None else []
+    if write_errors:
+        sources = {entry["dest"]: src for src, entry in new_pages.items()}
+        failures.extend((sources[dest], error) for dest, error in write_errors)
+    for src, error in failures:
+        print(f"Failed to render {src}: {error}")
+        # Leave failed pages out of the manifest so the next build retries them.
+        new_pages.pop(src, None)
+        pages.pop(src, None)
+
+    assets = {asset for entry in new_pages.values() for asset in entry.get("deps", {}).get("assets", ())}
+    save_manifest(manifest_path, {
+        "version": MANIFEST_VERSION,
+        "template": template_hash,
+        "basepath": basepath,
+        "pages": new_pages,
+        "assets": {asset: asset_stamp(asset) for asset in sorted(assets)},
+    })
+
+    rendered = len(dirty) - len(failures)
+    # pages and removed_sources let later stages (search index, sitemaps) update incrementally;
+    # refs covers every page, rendered or not, for link validation.
+    # unchanged counts the rendered pages whose output was identical and therefore not rewritten.
+    stats = {"rendered": rendered, "skipped": len(new_pages) - rendered, "unchanged": unchanged, "removed": removed,
+             "failed": failures,
+             "pages": pages, "removed_sources": sorted(set(old_pages) - set(new_pages) - {src for src, _ in failures}),
+             "refs": {src: entry.get("refs", ()) for src, entry in new_pages.items()}}
+    print(f"Rendered {stats['rendered']} pages ({unchanged} with identical output kept), skipped {stats['skipped']} unchanged, "
+          f"removed {stats['removed']} stale, {len(failures)} failed")
+    if writer is not None:
+        print(f"Wrote {writer.written} pages ({writer.bytes_written} bytes), {writer.unchanged} already up to date")
+    return stats
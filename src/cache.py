@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from src.converts import PARSER_VERSION
+
+DEFAULT_BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.json")
+ITEM_OVERHEAD = 8 # Rough per-ref and per-term cost beyond the strings themselves (JSON brackets, quotes, counts)
+
+
+def entry_size(entry): # Approximate size of an (html, refs, terms) entry, counting refs and terms as well as the HTML.
+    html, refs, terms = entry
+    return (len(html) + sum(len(kind) + len(url) + ITEM_OVERHEAD for kind, url in refs)
+            + sum(len(term) + ITEM_OVERHEAD for term, _ in terms))
+
+
+class BlockCache(): # LRU cache of rendered block HTML, refs and search terms, bounded by entry count and total size.
+    def __init__(self, max_entries=200000, max_bytes=256 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.track_added = False # set on the copy shipped to pool workers, which hand their new entries back
+        self._added = {} # entries stored since the last drain(), when track_added is set
+
+    def key(self, block, basepath, urls_token=""): # Cache key covering the block text, basepath, asset URLs and parser version.
+        data = f"{PARSER_VERSION}\0{basepath}\0{urls_token}\0{block}".encode()
+        return hashlib.sha1(data).hexdigest()
+
+    def get(self, key): # Return (html, refs, terms) for a cached block, or None.
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, html, refs=(), terms=None):
+        entry = (html, tuple(refs), tuple(terms.items()) if terms else ())
+        self._store(key, entry)
+        if self.track_added:
+            self._added[key] = entry
+
+    def _store(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= entry_size(old)
+        self.entries[key] = entry
+        self.bytes += entry_size(entry)
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= entry_size(evicted)
+
+    def subset(self, max_bytes): # A new cache of the most recently used entries that fit in max_bytes.
+        picked = []
+        size = 0
+        for key in reversed(self.entries):
+            entry = self.entries[key]
+            size += entry_size(entry)
+            if size > max_bytes:
+                break
+            picked.append((key, entry))
+        subset = BlockCache(self.max_entries, max_bytes)
+        for key, entry in reversed(picked):
+            subset._store(key, entry)
+        return subset
+
+    def drain(self): # Hand over new entries and counters since the last drain, then reset them.
+        delta = (self._added, self.hits, self.misses)
+        self._added = {}
+        self.hits = 0
+        self.misses = 0
+        return delta
+
+    def merge(self, delta): # Fold a worker's drain() result into this cache.
+        added, hits, misses = delta
+        for key, entry in added.items():
+            self._store(key, entry)
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.bytes}
+
+    @classmethod
+    def load(cls, path, **kwargs): # Load a saved cache, starting empty if it is missing or from another parser version.
+        cache = cls(**kwargs)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if not isinstance(data, dict) or data.get("parser_version") != PARSER_VERSION:
+            return cache
+        for key, html, refs, terms in data.get("entries", []):
+            cache._store(key, (html, tuple(tuple(ref) for ref in refs), tuple(tuple(term) for term in terms)))
+        return cache
+
+    def save(self, path): # Write entries least recently used first, so reloading keeps the LRU order.
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            entries = [[key, html, refs, terms] for key, (html, refs, terms) in self.entries.items()]
+            json.dump({"parser_version": PARSER_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, path)
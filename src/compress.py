@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli # Optional: only used when installed
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".svg", ".xml", ".json", ".txt")
+DEFAULT_MIN_SIZE = 1024
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0) # mtime=0 keeps the output reproducible
+
+
+def _brotli(data):
+    return brotli.compress(data)
+
+
+ENCODERS = {"gz": _gzip}
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+
+
+def available_formats():
+    return tuple(ENCODERS)
+
+
+def collect_compressible(dest_dir): # Sorted paths of every output file worth precompressing.
+    paths = []
+    for root, dirs, files in os.walk(dest_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def compress_file(path, fmt, min_size=DEFAULT_MIN_SIZE):
+    # Write path.<fmt> unless the file is too small or the compressed copy is already current.
+    # The compressed copy gets the source's mtime, which is how "current" is detected next time.
+    st = os.stat(path)
+    target = f"{path}.{fmt}"
+    if st.st_size < min_size:
+        if os.path.exists(target):
+            os.remove(target)
+        return {"path": path, "format": fmt, "status": "too small"}
+    try:
+        if os.stat(target).st_mtime_ns == st.st_mtime_ns:
+            return {"path": path, "format": fmt, "status": "unchanged"}
+    except FileNotFoundError:
+        pass
+
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = ENCODERS[fmt](data)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp_path, target)
+    return {
+        "path": path,
+        "format": fmt,
+        "status": "compressed",
+        "original": len(data),
+        "compressed": len(compressed),
+        "ratio": len(compressed) / len(data) if data else 1.0,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def remove_orphans(dest_dir, formats): # Delete compressed copies whose source output no longer exists.
+    removed = 0
+    suffixes = tuple(f".{fmt}" for fmt in formats)
+    for root, _, files in os.walk(dest_dir):
+        for name in files:
+            if name.endswith(suffixes):
+                path = os.path.join(root, name)
+                source = path.rsplit(".", 1)[0]
+                if source.endswith(COMPRESSIBLE_EXTENSIONS) and not os.path.exists(source):
+                    os.remove(path)
+                    removed += 1
+    return removed
+
+
+def compress_outputs(dest_dir, formats=("gz",), min_size=DEFAULT_MIN_SIZE, workers=4, report_path=None):
+    # Precompress HTML/CSS/etc. outputs in parallel. zlib releases the GIL, so threads are enough.
+    unknown = [fmt for fmt in formats if fmt not in ENCODERS]
+    if unknown:
+        raise ValueError(f"Unsupported compression format(s): {', '.join(unknown)} (available: {', '.join(ENCODERS)})")
+
+    tasks = [(path, fmt) for path in collect_compressible(dest_dir) for fmt in formats]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        reports = list(pool.map(lambda task: compress_file(task[0], task[1], min_size), tasks))
+    removed = remove_orphans(dest_dir, formats)
+
+    done = [report for report in reports if report["status"] == "compressed"]
+    original = sum(report["original"] for report in done)
+    compressed = sum(report["compressed"] for report in done)
+    seconds = sum(report["seconds"] for report in done)
+    unchanged = sum(1 for report in reports if report["status"] == "unchanged")
+    ratio = f", ratio {compressed / original:.2f}" if original else ""
+    print(f"Compressed {len(done)} files ({original} -> {compressed} bytes{ratio}, {seconds * 1000:.1f} ms CPU), "
+          f"{unchanged} unchanged, {removed} orphans removed")
+
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(reports, f, indent=1)
+    return reports
@@ -1,9 +1,17 @@
+import hashlib
+import io
+import itertools
+import json
 import os
-import re
-import textwrap
-from src.splits import split_nodes_image, split_nodes_link, split_nodes_delimiter
-from src.nodes import ParentNode, LeafNode, TextNode, TextType
-from src.blocknode import BlockType, block_to_block_type
+from src.splits import tokenize_inline
+from src.nodes import ParentNode, LeafNode, RawHTMLNode, TextNode, TextType, escape_text
+from src.blocknode import BlockType, classify_lines, split_block_lines, scan_blocks, iter_block_lines
+from src.template import Template, load_template
+from src.search import add_terms
+from src.assets import fingerprint_url
+from src.progress import Progress
+from src.scan import scan_pages
+from collections import Counter
 
 def text_to_textnode(text, text_type=TextType.TEXT): # Convert a plain text string to a TextNode with a specified text type.
     
@@ -11,88 +19,162 @@ def text_to_textnode(text, text_type=TextType.TEXT): # Convert a plain text stri
 
 
 def markdown_to_blocks(markdown): # Convert markdown text to blocks, where each block is a paragraph, heading, code block, quote, or list.
-    blocks = re.split(r'\n\s*\n', markdown.strip())
-    return [textwrap.dedent(block).strip() for block in blocks if block.strip()]
+    return ["\n".join(lines) for lines in split_block_lines(markdown)]
 
 
-def text_to_children(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-
-   
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-
-    return nodes
-
-def markdown_to_html_node(markdown, basepath="/"):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-
-    for block in blocks:
-        block = block.strip()
-        block_type = block_to_block_type(block)
-
-        if block_type == BlockType.HEADING:
-            lines = block.splitlines()
-            first_line = lines[0]
-            level = len(first_line) - len(first_line.lstrip('#'))
-            text = first_line[level:].strip()
-            text_nodes = text_to_children(text)
-            child_html_nodes = [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
-
-            if len(child_html_nodes) == 1 and isinstance(child_html_nodes[0], LeafNode):
-                node = LeafNode(tag=f"h{level}", value=child_html_nodes[0].value, props=child_html_nodes[0].props)
-            else:
-                node = ParentNode(tag=f"h{level}", children=child_html_nodes)
-            children.append(node)
-
-        elif block_type == BlockType.UNORDERED_LIST:
-            items = block.splitlines()
-            li_nodes = []
-            for item in items:
-                text = item[2:].strip()
-                text_nodes = text_to_children(text)
-                li_children = [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
-                li_nodes.append(ParentNode(tag="li", children=li_children))
-            ul_node = ParentNode(tag="ul", children=li_nodes)
-            children.append(ul_node)
-
-        elif block_type == BlockType.ORDERED_LIST:
-            items = block.splitlines()
-            li_nodes = []
-            for item in items:
-                content = item[item.find('.')+1:].strip()
-                text_nodes = text_to_children(content)
-                li_children = [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
-                li_nodes.append(ParentNode(tag="li", children=li_children))
-            ol_node = ParentNode(tag="ol", children=li_nodes)
-            children.append(ol_node)
-
-        elif block_type == BlockType.BLOCKQUOTE:
-            lines = [line[1:].strip() for line in block.splitlines()]
-            text = " ".join(lines).strip()
-            text_nodes = text_to_children(text)
-            child_html_nodes = [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
-            blockquote_node = ParentNode(tag="blockquote", children=child_html_nodes)
-            children.append(blockquote_node)
-
-        elif block_type == BlockType.CODE:
-            code_text = block.strip('```').strip()
-            code_node = LeafNode(tag="code", value=code_text)
-            pre_node = ParentNode(tag="pre", children=[code_node])
-            children.append(pre_node)
+PARSER_VERSION = 5 # Bump whenever block rendering changes, so cached fragments are not reused.
+
+_asset_urls = {} # Static path -> fingerprinted path, applied to link and image URLs (see set_asset_urls)
+_asset_urls_token = "" # Digest of _asset_urls, part of block cache keys so cached HTML never has stale URLs
+
+LARGE_SOURCE_SIZE = 8 * 1024 * 1024 # Sources of at least this many bytes are streamed block by block, never read whole.
+
+
+class PageFacts(): # What rendering learns besides HTML: link/image refs and, optionally, search term counts.
+    __slots__ = ("refs", "terms")
+
+    def __init__(self, collect_terms=False):
+        self.refs = []
+        self.terms = Counter() if collect_terms else None
+
+    def extend(self, refs, terms):
+        self.refs.extend(refs)
+        if self.terms is not None:
+            self.terms.update(dict(terms))
+
 
+def set_asset_urls(urls): # Use fingerprinted asset names (from sync_assets) in the URLs of every page rendered by this process.
+    global _asset_urls, _asset_urls_token
+    _asset_urls = dict(urls or {})
+    if _asset_urls:
+        _asset_urls_token = hashlib.sha1(json.dumps(_asset_urls, sort_keys=True).encode()).hexdigest()
+    else:
+        _asset_urls_token = ""
+
+
+def text_to_children(text):
+    return tokenize_inline(text)
+
+def markdown_to_html_node(markdown, basepath="/", cache=None, facts=None, blocks=None):
+    # With a BlockCache, unchanged blocks are reused as pre-rendered HTML instead of being parsed again.
+    # facts, when given, is a PageFacts collecting the page's link/image refs and search terms.
+    # blocks can be passed in when the caller already ran scan_blocks on markdown.
+    if blocks is None:
+        blocks = scan_blocks(markdown)
+    return ParentNode(tag="div", children=list(block_nodes(blocks, basepath, cache, facts)))
+
+
+def block_nodes(blocks, basepath="/", cache=None, facts=None): # Yield the HTML node of each (BlockType, lines) block.
+    for block_type, lines in blocks:
+        if cache is None:
+            yield lines_to_html_node(block_type, lines, basepath, facts)
+            continue
+        key = cache.key("\n".join(lines), basepath, _asset_urls_token)
+        entry = cache.get(key)
+        if entry is None:
+            # Always collect terms for cached blocks, so a later build with search enabled can reuse them.
+            block_facts = PageFacts(collect_terms=True)
+            html = lines_to_html_node(block_type, lines, basepath, block_facts).to_html()
+            cache.put(key, html, block_facts.refs, block_facts.terms)
+            block_refs, block_terms = block_facts.refs, block_facts.terms
         else:
-            text_nodes = text_to_children(block)
-            child_html_nodes = [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
-            p_node = ParentNode(tag="p", children=child_html_nodes)
-            children.append(p_node)
+            html, block_refs, block_terms = entry
+        if facts is not None:
+            facts.extend(block_refs, block_terms)
+        yield RawHTMLNode(html)
+
+
+class BlockStream(): # Page content rendered one block at a time straight to the output, for sources too big to hold whole.
+    # Stands in for the content ParentNode in a template context. It can be written only once,
+    # since it consumes its lines as it goes.
+    def __init__(self, lines, basepath="/", cache=None, facts=None):
+        self.lines = lines
+        self.basepath = basepath
+        self.cache = cache
+        self.facts = facts
+
+    def write_html(self, out):
+        blocks = ((classify_lines(lines), lines) for lines in iter_block_lines(self.lines))
+        out.write("<div>")
+        empty = True
+        for node in block_nodes(blocks, self.basepath, self.cache, self.facts):
+            node.write_html(out)
+            empty = False
+        if empty:
+            raise ValueError("All parent nodes must have children")
+        out.write("</div>")
+
+    def to_html(self):
+        buffer = io.StringIO()
+        self.write_html(buffer)
+        return buffer.getvalue()
+
+
+def block_to_html_node(block, basepath="/"): # Convert a single markdown block into its HTML node.
+    lines = block.split("\n")
+    return lines_to_html_node(classify_lines(lines), lines, basepath)
+
+
+def inline_to_html_nodes(text, basepath="/", facts=None): # Parse inline markdown into HTML nodes, recording refs and terms in facts.
+    text_nodes = text_to_children(text)
+    if facts is not None:
+        for tn in text_nodes:
+            if tn.url is not None:
+                facts.refs.append((tn.text_type.value, tn.url))
+            if facts.terms is not None:
+                add_terms(facts.terms, tn.text)
+    return [textnode_to_htmlnode(tn, basepath) for tn in text_nodes]
+
+
+def lines_to_html_node(block_type, lines, basepath="/", facts=None): # Convert an already classified block, given as lines, into its HTML node.
+    if block_type == BlockType.HEADING:
+        first_line = lines[0]
+        level = len(first_line) - len(first_line.lstrip('#'))
+        text = first_line[level:].strip()
+        child_html_nodes = inline_to_html_nodes(text, basepath, facts)
+
+        if len(child_html_nodes) == 1 and isinstance(child_html_nodes[0], LeafNode):
+            node = LeafNode(tag=f"h{level}", value=child_html_nodes[0].value, props=child_html_nodes[0].props)
+        else:
+            node = ParentNode(tag=f"h{level}", children=child_html_nodes)
+        return node
+
+    elif block_type == BlockType.UNORDERED_LIST:
+        li_nodes = []
+        for item in lines:
+            text = item[2:].strip()
+            li_children = inline_to_html_nodes(text, basepath, facts)
+            li_nodes.append(ParentNode(tag="li", children=li_children))
+        ul_node = ParentNode(tag="ul", children=li_nodes)
+        return ul_node
+
+    elif block_type == BlockType.ORDERED_LIST:
+        li_nodes = []
+        for item in lines:
+            content = item[item.find('.')+1:].strip()
+            li_children = inline_to_html_nodes(content, basepath, facts)
+            li_nodes.append(ParentNode(tag="li", children=li_children))
+        ol_node = ParentNode(tag="ol", children=li_nodes)
+        return ol_node
+
+    elif block_type == BlockType.BLOCKQUOTE:
+        text = " ".join([line[1:].strip() for line in lines]).strip()
+        child_html_nodes = inline_to_html_nodes(text, basepath, facts)
+        blockquote_node = ParentNode(tag="blockquote", children=child_html_nodes)
+        return blockquote_node
+
+    elif block_type == BlockType.CODE:
+        code_text = "\n".join(lines).strip('```').strip()
+        if facts is not None and facts.terms is not None:
+            add_terms(facts.terms, code_text)
+        code_node = LeafNode(tag="code", value=code_text)
+        pre_node = ParentNode(tag="pre", children=[code_node])
+        return pre_node
 
-    return ParentNode(tag="div", children=children)
+    else:
+        child_html_nodes = inline_to_html_nodes("\n".join(lines), basepath, facts)
+        p_node = ParentNode(tag="p", children=child_html_nodes)
+        return p_node
 
 
 
@@ -106,10 +188,10 @@ def textnode_to_htmlnode(textnode, basepath="/"):
     elif textnode.text_type == TextType.CODE:
         return LeafNode(tag="code", value=textnode.text)
     elif textnode.text_type == TextType.LINK:
-        return LeafNode(tag="a", value=textnode.text, props={"href": basepath + textnode.url})
+        return LeafNode(tag="a", value=textnode.text, props={"href": basepath + fingerprint_url(textnode.url, _asset_urls)})
     elif textnode.text_type == TextType.IMAGE:
         return LeafNode(tag="img", props={
-            "src": basepath + textnode.url,
+            "src": basepath + fingerprint_url(textnode.url, _asset_urls),
             "alt": textnode.text
         })
     else:
@@ -117,62 +199,169 @@ def textnode_to_htmlnode(textnode, basepath="/"):
 
 
 def extract_title(markdown: str) -> str: # Extract the first H1 title from the markdown text.
-    for line in markdown.splitlines():
+    return title_from_lines(markdown.splitlines())
+
+def title_from_lines(lines): # First H1 title among lines; stops reading at the title.
+    for line in lines:
         if line.strip().startswith("# "):  # H1 header
             return line.strip()[2:].strip()
     raise Exception("No H1 title found in the markdown.")
 
-def remove_title_line(markdown: str) -> str:
-    lines = markdown.splitlines()
-    new_lines = [line for line in lines if not line.strip().startswith("# ")]
-    return "\n".join(new_lines)
-
+def parse_front_matter(markdown): # Split optional "---" delimited "key: value" front matter from the markdown body.
+    if not markdown.startswith("---"):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].strip() != "---":
+        return {}, markdown
+    for end in range(1, len(lines)):
+        if lines[end].strip() == "---":
+            break
+    else:
+        return {}, markdown
+    return parse_meta_lines(lines[1:end]), "\n".join(lines[end + 1:])
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} with basepath {basepath}")
 
-    with open(from_path, "r") as f:
-        markdown = f.read()
+def parse_meta_lines(lines): # Parse front matter "key: value" lines into a dict.
+    meta = {}
+    for line in lines:
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            meta[key.strip()] = value.strip().strip('"').strip("'")
+    return meta
 
-    with open(template_path, "r") as f:
-        template = f.read()
 
-    content_html = markdown_to_html_node(markdown, basepath).to_html()
+def read_source_lines(path): # Yield a source file's lines without their newlines, read in buffered chunks.
+    with open(path, "r") as f:
+        for line in f:
+            yield line[:-1] if line.endswith("\n") else line
 
-    title = extract_title(markdown)
 
-    html = template.replace("{{ Title }}", title)\
-                   .replace("{{ Content }}", content_html)\
-                   .replace("{{ BasePath }}", basepath)
-                   
-              
-              
+def split_front_matter_lines(lines): # parse_front_matter for a line iterator: returns (meta, iterator over the body lines).
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or not first.startswith("---") or first.strip() != "---":
+        return {}, itertools.chain([] if first is None else [first], lines)
+    header = []
+    for line in lines:
+        if line.strip() == "---":
+            return parse_meta_lines(header), lines
+        header.append(line)
+    return {}, itertools.chain([first], header) # Never closed: it was body text all along
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(html)
 
+def remove_title_line(markdown: str) -> str:
+    lines = markdown.splitlines()
+    new_lines = [line for line in lines if not line.strip().startswith("# ")]
+    return "\n".join(new_lines)
 
-        
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
 
-    print(f"Generating pages in {dir_path_content} to {dest_dir_path} with basepath {basepath}")
-    print(f"Template path: {template_path}")
+def write_page(out, markdown, template, basepath="/", cache=None, collect_terms=False):
+    # Stream a rendered page to a file-like object and return what the build learned about it.
+    meta, body = parse_front_matter(markdown)
+    return write_parsed_page(out, meta, body, scan_blocks(body), template, basepath, cache, collect_terms)
+
+
+def write_parsed_page(out, meta, body, blocks, template, basepath="/", cache=None, collect_terms=False):
+    # write_page for a source already split into front matter, body and scanned blocks.
+    if isinstance(template, str):
+        template = Template(template)
+    facts = PageFacts(collect_terms)
+    root = markdown_to_html_node(body, basepath, cache, facts, blocks)
+    title = extract_title(body)
+
+    # Front matter keys become template variables; the built-in ones always win.
+    context = dict(meta)
+    context.update({"Title": escape_text(title), "Content": root, "BasePath": basepath})
+    template.write(out, context)
+    return {"title": title, "meta": meta, "refs": facts.refs, "terms": facts.terms}
+
+
+def output_key(meta, blocks, template, basepath="/", collect_terms=False):
+    # Content address of a page's output: everything its HTML (and search terms) are rendered from.
+    # Edits that scan_blocks normalizes away, such as extra blank lines or indentation, keep the same key.
+    h = hashlib.sha256(f"{PARSER_VERSION}\0{template.digest}\0{basepath}\0{_asset_urls_token}\0{collect_terms}\0".encode())
+    h.update(json.dumps(meta, sort_keys=True).encode())
+    for block_type, lines in blocks:
+        h.update(f"\0\0{block_type.value}\0".encode())
+        h.update("\n".join(lines).encode())
+    return h.hexdigest()
+
+
+def write_source_page(out, path, template, basepath="/", cache=None, collect_terms=False):
+    # write_page for a source file too big to read whole. Memory stays bounded by the largest block:
+    # a first pass reads only up to the title, and the second renders each block as it is read.
+    if isinstance(template, str):
+        template = Template(template)
+    title = title_from_lines(split_front_matter_lines(read_source_lines(path))[1])
+    meta, lines = split_front_matter_lines(read_source_lines(path))
+    facts = PageFacts(collect_terms)
+
+    context = dict(meta)
+    context.update({"Title": escape_text(title), "Content": BlockStream(lines, basepath, cache, facts), "BasePath": basepath})
+    template.write(out, context)
+    return {"title": title, "meta": meta, "refs": facts.refs, "terms": facts.terms}
+
+
+def render_page(markdown, template, basepath="/"): # Render a markdown document into the given template.
+    buffer = io.StringIO()
+    write_page(buffer, markdown, template, basepath)
+    return buffer.getvalue()
+
+
+def generate_page(from_path, template_path, dest_path, basepath="/", template=None, cache=None, writer=None,
+                  collect_terms=False, previous_key=None):
+    # template can be passed in pre-read so batch builds don't re-read template_path for every page.
+    # With a writer (see src/writer.py) the page is rendered to memory and handed over instead of written here.
+    # previous_key is the output_key of the page's last build: when it still matches, the page is neither
+    # rendered nor written, so its output keeps its mtime. The returned info then only says so.
+    if template is None:
+        template = load_template(template_path)
+    if isinstance(template, str):
+        template = Template(template)
+
+    # Large sources are streamed to disk here even with a writer, which would need the whole page in memory.
+    if os.path.getsize(from_path) >= LARGE_SOURCE_SIZE:
+        writer = None
+        render = lambda out: write_source_page(out, from_path, template, basepath, cache, collect_terms)
+    else:
+        with open(from_path, "r") as f:
+            markdown = f.read()
+        meta, body = parse_front_matter(markdown)
+        blocks = scan_blocks(body)
+        key = output_key(meta, blocks, template, basepath, collect_terms)
+        if key == previous_key and os.path.exists(dest_path):
+            return {"unchanged": True, "output_key": key}
+        render = lambda out: dict(write_parsed_page(out, meta, body, blocks, template, basepath, cache, collect_terms),
+                                  output_key=key)
+
+    if writer is not None:
+        buffer = io.StringIO()
+        info = render(buffer)
+        writer.submit(dest_path, buffer.getvalue().encode("utf-8"))
+        return info
 
-    for content in os.listdir(dir_path_content):
-        print(f"Processing content: {content}")
-        content_path = os.path.join(dir_path_content, content)
-        rel_path = os.path.relpath(content_path, start="content")
-        dest_path = os.path.join(dest_dir_path, rel_path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # Write next to the destination and swap it in, so a failed render never leaves a truncated page.
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            info = render(f)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return info
 
-        if os.path.isdir(content_path):
-            generate_pages_recursive(content_path, template_path, dest_dir_path, basepath)
-        elif content.endswith(".md"):
-            dest_path = dest_path.replace(".md", ".html")
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-            generate_page(content_path, template_path, dest_path, basepath)
 
 
 
-            
-            
\ No newline at end of file
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
+    # Render every page under dir_path_content (any directory, not just content/) to the same relative
+    # path under dest_dir_path. The tree is walked lazily and progress is printed at most every few seconds.
+    template = load_template(template_path)
+    progress = Progress(f"Generated pages in {dir_path_content}")
+    for src, dest, _ in scan_pages(dir_path_content, dest_dir_path):
+        generate_page(src, template_path, dest, basepath, template=template)
+        progress.update()
+    progress.close()
@@ -0,0 +1,78 @@
+import os
+
+EXTERNAL_PREFIXES = ("//", "#", "mailto:", "tel:", "data:")
+
+
+def url_path(url): # Site-relative path of a URL, or None for external links and in-page anchors.
+    if "://" in url or url.startswith(EXTERNAL_PREFIXES):
+        return None
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    return path.lstrip("/")
+
+
+def link_candidates(path, content_dir): # Markdown sources that would be rendered at a site path.
+    if path == "" or path.endswith("/"):
+        rels = [path + "index.md"]
+    elif path.endswith(".html"):
+        rels = [path[:-5] + ".md"]
+    else:
+        rels = [path + "/index.md", path + ".md"]
+    return [os.path.normpath(os.path.join(content_dir, rel)) for rel in rels]
+
+
+def page_dependencies(refs, content_dir, static_dir=None):
+    # Turn a page's (text type, url) refs into the static assets and markdown sources it depends on.
+    # Targets are recorded even if they don't exist yet, so creating them invalidates the page.
+    assets = set()
+    links = set()
+    for text_type, url in refs:
+        path = url_path(url)
+        if path is None:
+            continue
+        extension = os.path.splitext(path)[1]
+        if text_type == "image" or (extension and extension != ".html"):
+            if static_dir is not None:
+                assets.add(os.path.normpath(os.path.join(static_dir, path)))
+        else:
+            links.update(link_candidates(path, content_dir))
+    return {"assets": sorted(assets), "links": sorted(links)}
+
+
+def asset_stamp(path): # (size, mtime_ns) of an asset, or None if it doesn't exist.
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def changed_assets(old_stamps): # Assets whose stamp differs from the one recorded at the last build.
+    return {path for path, stamp in old_stamps.items() if asset_stamp(path) != stamp}
+
+
+def dependents(pages, paths): # Sources of pages whose template, assets or links include any of paths.
+    paths = {os.path.normpath(path) for path in paths}
+    affected = set()
+    for src, entry in pages.items():
+        deps = entry.get("deps")
+        if deps is None:
+            continue
+        if os.path.normpath(deps["template"]) in paths \
+                or paths.intersection(deps["assets"]) or paths.intersection(deps["links"]):
+            affected.add(src)
+    return affected
+
+
+def affected_pages(manifest, path): # Answer "what rebuilds if I touch path?" from a saved manifest.
+    pages = manifest["pages"]
+    normalized = os.path.normpath(path)
+    sources = {src for src in pages if os.path.normpath(src) == normalized}
+    if sources and os.path.exists(path):
+        # Editing an existing page re-renders only that page: the pages linking to it depend on
+        # it existing, not on its content, just as in build_site.
+        return sorted(sources)
+    # A page being added or removed re-renders the pages linking to it; a new page renders itself too.
+    affected = dependents(pages, [path])
+    if not sources and normalized.endswith(".md"):
+        affected.add(path)
+    return sorted(affected)
@@ -0,0 +1,110 @@
+import os
+from src.nodes import escape_attribute as escape
+from src.pageindex import iso_time
+from src.writer import same_contents
+
+MAX_SITEMAP_URLS = 50000 # Limits from the sitemaps.org protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+FEED_ENTRIES = 20
+SITEMAP_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_FOOTER = "</urlset>\n"
+
+
+def absolute_url(site_url, url): # Join the site's origin (e.g. https://example.com) and a site URL.
+    return site_url.rstrip("/") + "/" + url.lstrip("/")
+
+
+def write_if_changed(path, text): # Write text to path unless it already holds it; returns whether it was written.
+    data = text.encode("utf-8")
+    if same_contents(path, data):
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def sitemap_chunks(entries, max_urls=MAX_SITEMAP_URLS, max_bytes=MAX_SITEMAP_BYTES):
+    # Split <url> entries into sitemap bodies that stay within both limits.
+    chunks = []
+    current = []
+    size = len(SITEMAP_HEADER) + len(SITEMAP_FOOTER)
+    for entry in entries:
+        entry_size = len(entry.encode("utf-8"))
+        if current and (len(current) >= max_urls or size + entry_size > max_bytes):
+            chunks.append(current)
+            current = []
+            size = len(SITEMAP_HEADER) + len(SITEMAP_FOOTER)
+        current.append(entry)
+        size += entry_size
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+def write_sitemaps(pages, dest_dir, site_url, basepath="/", max_urls=MAX_SITEMAP_URLS, max_bytes=MAX_SITEMAP_BYTES):
+    # Write sitemap.xml from the page index. Past the size limits it becomes a sitemap index pointing
+    # at sitemap-1.xml, sitemap-2.xml, ...; files whose contents didn't change are left alone.
+    entries = []
+    for page in sorted(pages.values(), key=lambda page: page["url"]):
+        loc = escape(absolute_url(site_url, page["url"]))
+        entries.append(f"<url><loc>{loc}</loc><lastmod>{iso_time(page['mtime'])}</lastmod></url>\n")
+    chunks = sitemap_chunks(entries, max_urls, max_bytes)
+
+    written = 0
+    names = []
+    if len(chunks) == 1:
+        written += write_if_changed(os.path.join(dest_dir, "sitemap.xml"), SITEMAP_HEADER + "".join(chunks[0]) + SITEMAP_FOOTER)
+    else:
+        parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+        for number, chunk in enumerate(chunks, 1):
+            name = f"sitemap-{number}.xml"
+            names.append(name)
+            written += write_if_changed(os.path.join(dest_dir, name), SITEMAP_HEADER + "".join(chunk) + SITEMAP_FOOTER)
+            parts.append(f"<sitemap><loc>{escape(absolute_url(site_url, basepath + name))}</loc></sitemap>\n")
+        parts.append("</sitemapindex>\n")
+        written += write_if_changed(os.path.join(dest_dir, "sitemap.xml"), "".join(parts))
+
+    for name in os.listdir(dest_dir):
+        if name.startswith("sitemap-") and name.endswith(".xml") and name not in names:
+            os.remove(os.path.join(dest_dir, name))
+    return written
+
+
+def page_updated(page): # Timestamp of a page for feeds: its front matter date when it has one, else the source mtime.
+    date = page["meta"].get("date")
+    if date:
+        return date if "T" in date else date + "T00:00:00Z"
+    return iso_time(page["mtime"])
+
+
+def write_feed(pages, dest_dir, site_url, basepath="/", section="blog/", path="feed.xml", limit=FEED_ENTRIES):
+    # Write an Atom feed of the newest pages whose site path is under section. The feed is titled
+    # after the section's own index page, which is not an entry itself.
+    title = section.strip("/").capitalize()
+    posts = []
+    for page in pages.values():
+        if page["path"] == section:
+            title = page["title"]
+        elif page["path"].startswith(section):
+            posts.append(page)
+    posts.sort(key=lambda page: (page_updated(page), page["url"]), reverse=True)
+    posts = posts[:limit]
+    feed_url = absolute_url(site_url, basepath + path)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(title)}</title>\n<id>{escape(feed_url)}</id>\n",
+        f'<link rel="self" href="{escape(feed_url)}"/>\n',
+        f"<updated>{page_updated(posts[0]) if posts else iso_time(0)}</updated>\n",
+    ]
+    for page in posts:
+        url = escape(absolute_url(site_url, page["url"]))
+        parts.append(f'<entry><title>{escape(page["title"])}</title><id>{url}</id><link href="{url}"/>'
+                     f"<updated>{page_updated(page)}</updated>")
+        description = page["meta"].get("description")
+        if description:
+            parts.append(f"<summary>{escape(description)}</summary>")
+        parts.append("</entry>\n")
+    parts.append("</feed>\n")
+    return write_if_changed(os.path.join(dest_dir, path), "".join(parts))
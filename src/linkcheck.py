@@ -0,0 +1,54 @@
+import os
+from src.depgraph import url_path
+
+
+def output_index(dest_dir): # Set of every file under dest_dir as a "/"-separated site path, from a single walk.
+    index = set()
+    for root, dirs, files in os.walk(dest_dir):
+        rel_root = os.path.relpath(root, dest_dir)
+        prefix = "" if rel_root == "." else rel_root.replace(os.sep, "/") + "/"
+        for name in files:
+            index.add(prefix + name)
+    return index
+
+
+def target_exists(path, index): # Whether a site path is served by something in the index; a few set lookups, no filesystem access.
+    if path == "" or path.endswith("/"):
+        return path + "index.html" in index
+    if path in index:
+        return True
+    if os.path.splitext(path)[1]:
+        return False
+    return path + "/index.html" in index or path + ".html" in index
+
+
+def broken_refs(refs, index): # The (text type, url) refs of one page that point at nothing in the index.
+    broken = []
+    for text_type, url in refs:
+        path = url_path(url)
+        if path is not None and not target_exists(path, index):
+            broken.append((text_type, url))
+    return broken
+
+
+def validate_links(page_refs, dest_dir, asset_urls=None): # Check every page's refs against the built site; returns {source: broken refs}.
+    index = output_index(dest_dir)
+    # Refs keep the original asset names; with fingerprinting they exist if their fingerprinted file does.
+    index.update(path for path, target in (asset_urls or {}).items() if target in index)
+    report = {}
+    for src in sorted(page_refs):
+        broken = broken_refs(page_refs[src], index)
+        if broken:
+            report[src] = broken
+    return report
+
+
+def report_broken_links(report): # Print broken refs and return how many there were.
+    count = 0
+    for src, broken in report.items():
+        for text_type, url in broken:
+            print(f"Broken {text_type} in {src}: {url}")
+            count += 1
+    if count:
+        print(f"Found {count} broken references in {len(report)} pages")
+    return count
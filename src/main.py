@@ -1,30 +1,312 @@
-import sys
-import shutil
+import argparse
 import os
-from src.converts import generate_pages_recursive
+import sys
+from src.assets import ASSET_MODES
+from src.shards import DEFAULT_SHARD_DIR, SHARD_STRATEGIES
+
+# Only light modules are imported up front. The renderer, process pools, compression, feeds and the
+# HTTP server are imported by the commands that use them, so --help, clean and check start quickly.
+
+COMMANDS = ("build", "serve", "clean", "check")
+CACHE_DIR = ".cache" # Holds the build manifest, block cache and other incremental state
+
+
+def parse_shard(value): # "K/N" -> (K, N) with 0 <= K < N.
+    index, sep, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not sep or count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"expected K/N with 0 <= K < N, got {value!r}")
+    return index, count
+
+
+def protected_path(args):
+    # The first of the working directory and the site sources that deleting --output would take with it, or None.
+    output = os.path.realpath(args.output)
+    paths = [("the current directory", os.getcwd())]
+    for name, default in (("content", "content"), ("static", "static"), ("template", "template.html")):
+        path = getattr(args, name, default)
+        paths.append((path, path))
+    for label, path in paths:
+        path = os.path.realpath(path)
+        if os.path.commonpath([output, path]) == output:
+            return label
+    return None
+
+
+def add_site_options(parser): # Where the output and the build state live; shared by every command.
+    parser.add_argument("-o", "--output", default="docs", metavar="DIR", help="output directory (default: docs)")
+    parser.add_argument("--manifest", metavar="PATH", help="incremental build manifest (default: .cache/manifest.json)")
+
+
+def add_source_options(parser): # What to build from; for the commands that render.
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix for links and assets (default: /)")
+    parser.add_argument("--content", default="content", metavar="DIR", help="markdown sources (default: content)")
+    parser.add_argument("--template", default="template.html", metavar="PATH", help="page template (default: template.html)")
+    parser.add_argument("--static", default="static", metavar="DIR", help="static files copied to the output (default: static)")
+
+
+def add_build_options(parser):
+    parser.add_argument("--full", action="store_true", help="delete the output directory and re-render every page")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for rendering (0 = one per CPU)")
+    parser.add_argument("--writer-threads", type=int, default=0, metavar="N",
+                        help="write pages on N background threads, skipping identical outputs (0 = write inline)")
+    parser.add_argument("--fsync", action="store_true", help="with --writer-threads, fsync outputs in batches")
+    parser.add_argument("--block-cache", metavar="PATH",
+                        help="persistent cache of rendered block HTML (default: .cache/blocks.json)")
+    parser.add_argument("--no-block-cache", action="store_true", help="parse every block from scratch")
+    parser.add_argument("--asset-mode", choices=ASSET_MODES, default="copy",
+                        help="how changed static files are placed in the output (falls back to copy)")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="give static files content-hashed names and rewrite references to them, for long cache TTLs")
+    parser.add_argument("--checksum-assets", action="store_true",
+                        help="compare asset contents when size matches but mtime differs")
+    parser.add_argument("--profile", type=int, nargs="?", const=10, metavar="N",
+                        help="time each build stage and report the N slowest pages (default: 10); skips the block cache")
+    parser.add_argument("--profile-json", metavar="PATH", help="also write the profile report as JSON")
+    parser.add_argument("--compress", metavar="FORMATS",
+                        help="write precompressed copies of HTML/CSS outputs, e.g. gz or gz,br (br needs the brotli package)")
+    parser.add_argument("--compress-min-size", type=int, metavar="BYTES",
+                        help="don't compress outputs smaller than this (default: 1024)")
+    parser.add_argument("--compress-report", metavar="PATH", help="write per-file compression ratio and time as JSON")
+    parser.add_argument("--search", action="store_true", help="build a sharded client-side search index in <output>/search/")
+    parser.add_argument("--sitemap", action="store_true", help="write sitemap.xml (split past the protocol's size limits)")
+    parser.add_argument("--feed", action="store_true", help="write an Atom feed of the blog/ pages to feed.xml")
+    parser.add_argument("--site-url", metavar="URL", help="origin used for absolute URLs in the sitemap and feed, e.g. https://example.com")
+    parser.add_argument("--check-links", action="store_true",
+                        help="report links and images that point at no page or static file")
+    parser.add_argument("--strict-links", action="store_true", help="like --check-links, but fail the build on broken refs")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="build only shard K of N into --shard-dir; run --merge-shards N once every shard is built")
+    parser.add_argument("--shard-strategy", choices=SHARD_STRATEGIES, default="hash",
+                        help="split pages by path hash (stable) or by source size (balanced)")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="merge the outputs of N shard builds into the output directory and run the post-build steps")
+    parser.add_argument("--shard-dir", default=DEFAULT_SHARD_DIR, metavar="DIR", help="where shard builds keep their outputs")
+    parser.add_argument("--affected", metavar="PATH",
+                        help="list the pages that would rebuild if PATH (template, asset or page) changed, then exit")
+
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "build") # `python -m src.main [basepath] [options]` still means build
+
+    parser = argparse.ArgumentParser(description="Static site generator: markdown in, HTML out.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    build_parser = commands.add_parser("build", help="render the site (the default command)")
+    add_source_options(build_parser)
+    add_site_options(build_parser)
+    add_build_options(build_parser)
+    build_parser.add_argument("--watch", action="store_true", help="after building, serve the output and rebuild on changes")
+    build_parser.add_argument("--port", type=int, default=8888, help="port for --watch (default: 8888)")
+
+    serve_parser = commands.add_parser("serve", help="build, then serve the output and rebuild changed pages and assets")
+    add_source_options(serve_parser)
+    add_site_options(serve_parser)
+    add_build_options(serve_parser)
+    serve_parser.add_argument("--port", type=int, default=8888, help="port to serve on (default: 8888)")
+
+    clean_parser = commands.add_parser("clean", help=f"delete the output directory and {CACHE_DIR}/")
+    add_site_options(clean_parser)
+
+    check_parser = commands.add_parser("check", help="check the links of the last build against its output, without rebuilding")
+    add_site_options(check_parser)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        args.watch = True
+    if args.command == "clean" or (args.command in ("build", "serve") and args.full and not args.shard):
+        protected = protected_path(args)
+        if protected is not None:
+            parser.error(f"refusing to delete output directory {args.output}: it contains {protected}")
+    if args.command in ("build", "serve"):
+        if (args.sitemap or args.feed) and not args.site_url:
+            parser.error("--sitemap and --feed need --site-url")
+        if args.shard and args.merge_shards:
+            parser.error("--shard and --merge-shards are separate steps")
+        if args.merge_shards and args.full:
+            parser.error("--full applies to the shard builds; merge them without it")
+        if (args.shard or args.merge_shards) and args.fingerprint:
+            parser.error("--fingerprint is not supported for shard builds or merges")
+    return args
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-    dest_dir = "docs"
 
-    if os.path.exists(dest_dir):
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "clean":
+        clean(args)
+    elif args.command == "check":
+        if check(args):
+            sys.exit(1)
+    else:
+        build(args)
+
+
+def build(args):
+    from src.build import build_site, resolve_workers
+    from src.manifest import DEFAULT_MANIFEST_PATH
+    from src.cache import BlockCache, DEFAULT_BLOCK_CACHE_PATH
+    from src.assets import sync_assets
+    from src import profiling
+
+    basepath = args.basepath
+    dest_dir = args.output
+    manifest_path = args.manifest or DEFAULT_MANIFEST_PATH
+
+    if args.affected:
+        from src.manifest import load_manifest
+        from src.depgraph import affected_pages
+        for src in affected_pages(load_manifest(manifest_path), args.affected):
+            print(src)
+        return
+
+    if args.shard:
+        build_shard(args, basepath)
+        return
+
+    if args.full and os.path.exists(dest_dir):
+        import shutil
         shutil.rmtree(dest_dir)
 
-    copy_static_to_docs()
+    asset_stats = sync_assets(args.static, dest_dir, mode=args.asset_mode, checksum=args.checksum_assets,
+                              fingerprint=args.fingerprint, workers=resolve_workers(args.jobs))
+
+    profiler = profiling.enable() if args.profile is not None or args.profile_json else None
+
+    block_cache_path = args.block_cache or DEFAULT_BLOCK_CACHE_PATH
+    # Cached blocks come back as pre-rendered HTML, which would hide their nodes and serialize time from the profile.
+    if profiler is not None and not args.no_block_cache:
+        print("Profiling is enabled, not using the block cache so every block is parsed and serialized")
+    block_cache = None if args.no_block_cache or args.merge_shards or profiler is not None else BlockCache.load(block_cache_path)
+
+    indexes = requested_indexes(args)
+    if args.merge_shards:
+        from src.shards import merge_shards
+        stats = merge_shards(args.shard_dir, args.merge_shards, dest_dir, mode=args.asset_mode)
+    else:
+        # An index whose saved state is gone can only be rebuilt from every page, so render them all.
+        rebuild_indexes = any(not os.path.exists(path) for path in indexes.values())
+        stats = build_site(args.content, args.template, dest_dir, basepath,
+                           manifest_path=manifest_path, force=args.full or rebuild_indexes, workers=args.jobs,
+                           block_cache=block_cache, static_dir=args.static, writer_threads=args.writer_threads,
+                           fsync=args.fsync, collect_terms=args.search, asset_urls=asset_stats["urls"],
+                           indexes=tuple(indexes))
+
+    if args.search:
+        from src.search import update_search_index
+        update_search_index(dest_dir, stats["pages"], stats["removed_sources"], basepath, reset=args.full,
+                            live=stats["refs"])
+
+    if args.sitemap or args.feed:
+        from src.pageindex import update_page_index
+        from src.feeds import write_sitemaps, write_feed
+        page_index = update_page_index(dest_dir, stats["pages"], stats["removed_sources"], basepath, args.site_url,
+                                       reset=args.full, live=stats["refs"])
+        if args.sitemap and (page_index["changed"] or not os.path.exists(os.path.join(dest_dir, "sitemap.xml"))):
+            write_sitemaps(page_index["pages"], dest_dir, args.site_url, basepath)
+        if args.feed and (page_index["changed"] or not os.path.exists(os.path.join(dest_dir, "feed.xml"))):
+            write_feed(page_index["pages"], dest_dir, args.site_url, basepath)
 
-    generate_pages_recursive("content", "template.html", dest_dir, basepath)
+    broken_links = 0
+    if args.check_links or args.strict_links:
+        from src.linkcheck import validate_links, report_broken_links
+        broken_links = report_broken_links(validate_links(stats["refs"], dest_dir, asset_stats["urls"]))
+
+    if args.compress:
+        from src.compress import compress_outputs, DEFAULT_MIN_SIZE
+        min_size = DEFAULT_MIN_SIZE if args.compress_min_size is None else args.compress_min_size
+        compress_outputs(dest_dir, args.compress.split(","), min_size,
+                         workers=resolve_workers(args.jobs), report_path=args.compress_report)
+
+    if block_cache is not None:
+        cache_stats = block_cache.stats()
+        print(f"Block cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries")
+        block_cache.save(block_cache_path)
+
+    if profiler is not None:
+        profiling.disable()
+        profiling.write_report(profiler, top=args.profile or 10, json_path=args.profile_json)
+    if args.watch:
+        from src.serve import Watcher, watch_and_serve
+        watcher = Watcher(args.content, args.static, args.template, dest_dir, basepath, workers=args.jobs,
+                          fingerprint=args.fingerprint, asset_urls=asset_stats["urls"], asset_mode=args.asset_mode)
+        watch_and_serve(watcher, port=args.port)
+    elif stats["failed"] or (args.strict_links and broken_links):
+        sys.exit(1)
+
+def requested_indexes(args): # The indexes fed from this build's rendered pages, mapped to the state file each keeps.
+    from src.search import DEFAULT_SEARCH_STATE_PATH
+    from src.pageindex import DEFAULT_PAGE_INDEX_PATH
+    indexes = {}
+    if args.search:
+        indexes["search"] = DEFAULT_SEARCH_STATE_PATH
+    if args.sitemap or args.feed:
+        indexes["pages"] = DEFAULT_PAGE_INDEX_PATH
+    return indexes
+
+def build_shard(args, basepath): # Build one shard into its own directory, with its own manifest and block cache.
+    import shutil
+    from src.build import build_site
+    from src.cache import BlockCache
+    from src.shards import save_shard_stats, shard_path
+
+    index, count = args.shard
+    shard_root = shard_path(args.shard_dir, index)
+    shard_dest = os.path.join(shard_root, "docs")
+    if args.full and os.path.exists(shard_dest):
+        shutil.rmtree(shard_dest)
+    cache_path = os.path.join(shard_root, "blocks.json")
+    block_cache = None if args.no_block_cache else BlockCache.load(cache_path)
+    stats = build_site(args.content, args.template, shard_dest, basepath,
+                       manifest_path=os.path.join(shard_root, "manifest.json"), force=args.full, workers=args.jobs,
+                       block_cache=block_cache, static_dir=args.static, writer_threads=args.writer_threads, fsync=args.fsync,
+                       collect_terms=args.search, shard=args.shard, shard_strategy=args.shard_strategy,
+                       indexes=tuple(requested_indexes(args)))
+    save_shard_stats(shard_root, stats, reset=args.full)
+    if block_cache is not None:
+        block_cache.save(cache_path)
+    print(f"Built shard {index} of {count} into {shard_root}")
+    if stats["failed"]:
+        sys.exit(1)
+
+def clean(args): # Delete the output directory and all incremental build state.
+    import shutil
+    for path in (args.output, CACHE_DIR):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+            print(f"Removed {path}/")
+    # A custom manifest is a single file; never remove a directory given by mistake.
+    if args.manifest and os.path.isfile(args.manifest):
+        os.remove(args.manifest)
+        print(f"Removed {args.manifest}")
+
+def check(args): # Check the refs recorded by the last build against its output; returns the number of broken refs.
+    from src.assets import DEFAULT_ASSET_MANIFEST_PATH, empty_asset_manifest
+    from src.linkcheck import validate_links, report_broken_links
+    from src.manifest import load_manifest, DEFAULT_MANIFEST_PATH
+
+    pages = load_manifest(args.manifest or DEFAULT_MANIFEST_PATH)["pages"]
+    if not pages:
+        print("No build manifest found, run a build first")
+        return 1
+    # Fingerprinted builds record each asset's content-addressed name in the asset manifest.
+    assets = load_manifest(DEFAULT_ASSET_MANIFEST_PATH, empty=empty_asset_manifest)["assets"]
+    asset_urls = {rel_path.replace(os.sep, "/"): entry["dest"].replace(os.sep, "/")
+                  for rel_path, entry in assets.items() if "dest" in entry}
+    page_refs = {src: entry.get("refs", ()) for src, entry in pages.items()}
+    broken = report_broken_links(validate_links(page_refs, args.output, asset_urls))
+    print(f"Checked {len(page_refs)} pages, {broken} broken references")
+    return broken
 
 def copy_static_to_docs(static_dir="static", public_dir="docs"):
+    from src.assets import sync_assets, DEFAULT_ASSET_MANIFEST_PATH
     os.makedirs(public_dir, exist_ok=True)
-    
-    for item in os.listdir(static_dir):
-        s = os.path.join(static_dir, item)
-        d = os.path.join(public_dir, item)
-        if os.path.isdir(s):
-            shutil.copytree(s, d, dirs_exist_ok=True)
-        else:
-            shutil.copy2(s, d)
-            
-            
+    return sync_assets(static_dir, public_dir, manifest_path=DEFAULT_ASSET_MANIFEST_PATH)
+
+
 if __name__ == "__main__":
     main()
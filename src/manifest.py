@@ -0,0 +1,39 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 3
+DEFAULT_MANIFEST_PATH = os.path.join(".cache", "manifest.json")
+
+
+def hash_file(path): # Return the sha256 hex digest of a file's contents, read in chunks.
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "template": None, "basepath": None, "pages": {}, "assets": {}}
+
+
+def load_manifest(path, empty=empty_manifest): # Load a manifest, falling back to empty() if it is missing, corrupt or outdated.
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty()
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return empty()
+    return data
+
+
+def save_manifest(path, manifest): # Write the manifest atomically so an interrupted build never leaves a half-written file.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
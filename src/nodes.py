@@ -1,5 +1,34 @@
 from enum import Enum
+from types import MappingProxyType
 
+EMPTY_CHILDREN = () # Shared by every node without children
+EMPTY_PROPS = MappingProxyType({}) # Shared, read-only props of every node without attributes
+VOID_TAGS = frozenset({"img", "br", "hr", "input", "meta", "link"})
+
+# Most strings need no escaping. Checking with `in` (a memchr scan per character) is several times
+# cheaper than a regex search or unconditional replace() calls, so the replacing only runs when needed.
+
+def escape_text(text): # Escape &, < and > for HTML element content.
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value): # Escape a value for a double-quoted HTML attribute.
+    if type(value) is not str:
+        value = str(value)
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return value
+
+
+class _TagStrings(dict): # tag -> ("<tag>", "<tag", "</tag>"), built the first time a tag is serialized.
+    def __missing__(self, tag):
+        strings = self[tag] = ("<" + tag + ">", "<" + tag, "</" + tag + ">")
+        return strings
+
+
+TAG_STRINGS = _TagStrings()
 
 
 class TextType(Enum): # Enum to represent different types of text nodes.
@@ -11,6 +40,8 @@ class TextType(Enum): # Enum to represent different types of text nodes.
     IMAGE = "image"
 
 class TextNode(): # Represents a text node in the document, which can be plain text, bold, italic, code, link, or image.
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -29,41 +60,99 @@ class TextNode(): # Represents a text node in the document, which can be plain t
       
             
 class HTMLNode: # Base class for HTML nodes, which can be either leaf or parent nodes.
+    # Children and props are only stored when given; otherwise the shared empty containers are returned.
+    __slots__ = ("tag", "value", "_children", "_props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self._children = children
+        self._props = props or None
+
+    @property
+    def children(self):
+        children = self._children
+        return EMPTY_CHILDREN if children is None else children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+
+    @property
+    def props(self):
+        return self._props or EMPTY_PROPS
+
+    @props.setter
+    def props(self, props):
+        self._props = props or None
         
     def to_html(self):
         raise NotImplementedError("Subclasses must implement the to_html method")
 
+    def write_html(self, out): # Stream the node's HTML to a file-like object instead of building one big string.
+        raise NotImplementedError("Subclasses must implement the write_html method")
+
     
     def props_to_html(self):
-        return "".join([f' {key}="{value}"' for key, value in self.props.items()])
+        props = self._props
+        if not props:
+            return ""
+        html = ""
+        for key, value in props.items():
+            html += " " + key + '="' + escape_attribute(value) + '"'
+        return html
     
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
         
         
 class LeafNode(HTMLNode): # Represents a leaf node in the HTML structure, which has a tag and a value.
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         super().__init__(tag=tag, value=value, props=props)
         
-    def to_html(self):
-        void_tags = {"img", "br", "hr", "input", "meta", "link"}
-        if self.tag in void_tags:
-            return f"<{self.tag}{self.props_to_html()} />"
-        if self.value is None:
+    def to_html(self): # The value is escaped as text; use RawHTMLNode for markup that is already HTML.
+        tag = self.tag
+        if tag in VOID_TAGS:
+            return TAG_STRINGS[tag][1] + self.props_to_html() + " />"
+        value = self.value
+        if value is None:
             raise ValueError("All leaf nodes must have a value")
-        if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
+        if tag is None:
+            return value
+        open_tag, open_prefix, close_tag = TAG_STRINGS[tag]
+        if self._props is None:
+            return open_tag + value + close_tag
+        return open_prefix + self.props_to_html() + ">" + value + close_tag
+
+    def write_html(self, out):
+        out.write(self.to_html())
         
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
+
+
+class RawHTMLNode(LeafNode): # Markup that is already HTML (such as a cached block), written without escaping.
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(value=value)
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("All leaf nodes must have a value")
+        return self.value
+
+    def __repr__(self):
+        return f"RawHTMLNode({self.value})"
+
     
 class ParentNode(HTMLNode): # Represents a parent node in the HTML structure, which can have children and a tag.
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None):
         super().__init__(tag=tag, children=children, props=props)
         
@@ -76,7 +165,24 @@ class ParentNode(HTMLNode): # Represents a parent node in the HTML structure, wh
             if not isinstance(child, HTMLNode):
                 raise TypeError("All children must be instances of HTMLNode")
         children_html = "".join([child.to_html() for child in self.children])
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        open_tag, open_prefix, close_tag = TAG_STRINGS[self.tag]
+        if self._props is None:
+            return open_tag + children_html + close_tag
+        return open_prefix + self.props_to_html() + ">" + children_html + close_tag
+
+    def write_html(self, out):
+        if self.tag is None:
+            raise ValueError("All parent nodes must have a tag")
+        if not self.children:
+            raise ValueError("All parent nodes must have children")
+        write = out.write
+        open_tag, open_prefix, close_tag = TAG_STRINGS[self.tag]
+        write(open_tag if self._props is None else open_prefix + self.props_to_html() + ">")
+        for child in self.children:
+            if not isinstance(child, HTMLNode):
+                raise TypeError("All children must be instances of HTMLNode")
+            child.write_html(out)
+        write(close_tag)
 
 
     def __repr__(self):
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime, timezone
+from src.manifest import load_manifest, save_manifest, MANIFEST_VERSION
+from src.search import page_url
+
+DEFAULT_PAGE_INDEX_PATH = os.path.join(".cache", "pages.json")
+
+
+def empty_page_index():
+    return {"version": MANIFEST_VERSION, "pages": {}}
+
+
+def iso_time(timestamp): # Seconds since the epoch as a W3C/RFC 3339 UTC datetime.
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def update_page_index(dest_dir, rendered, removed, basepath="/", site_url="", state_path=DEFAULT_PAGE_INDEX_PATH,
+                      reset=False, live=None):
+    # Record title, URL, source mtime and front matter of the pages rendered in this build, and forget
+    # removed ones. Pages skipped by an incremental build keep the entry from the build that rendered them.
+    # live, when given, holds every source still in the site; pages not in it are forgotten too.
+    # state["changed"] tells the sitemap and feed writers whether anything needs rewriting.
+    state = empty_page_index() if reset else load_manifest(state_path, empty=empty_page_index)
+    pages = state["pages"]
+    changed = state.get("site_url") != site_url
+    state["site_url"] = site_url
+    if live is not None:
+        removed = set(removed) | (set(pages) - set(live))
+    for src in removed:
+        changed = pages.pop(src, None) is not None or changed
+    for src, page in rendered.items():
+        url = page_url(page["dest"], dest_dir, basepath)
+        entry = {"title": page["title"], "url": url, "path": url[len(basepath):],
+                 "mtime": os.stat(src).st_mtime, "meta": page["meta"]}
+        if pages.get(src) != entry:
+            pages[src] = entry
+            changed = True
+    save_manifest(state_path, state)
+    state["changed"] = changed or reset
+    return state
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from src import blocknode, converts
+from src.template import Template
+
+# Stage name -> (object, attribute) of the function timed for it. The functions are only
+# wrapped while a profiler is enabled, so an unprofiled build runs the original code.
+STAGES = {
+    "split": (converts, "scan_blocks"),
+    "classify": (blocknode, "classify_lines"),
+    "inline": (converts, "text_to_children"),
+    "convert": (converts, "textnode_to_htmlnode"),
+    "assemble": (converts, "markdown_to_html_node"),
+    "serialize": (Template, "write"),
+}
+STAGE_ORDER = tuple(STAGES) + ("io",)
+
+_active = None
+
+
+def active(): # The enabled Profiler, or None when profiling is off.
+    return _active
+
+
+def count_nodes(node): # Number of HTML nodes in a tree.
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+class Profiler(): # Collects exclusive per-stage time, node counts and output bytes for every page.
+    def __init__(self):
+        self.pages = []
+        self._page = None
+        self._stack = [] # time spent in nested stages, one accumulator per open call
+        self._originals = []
+
+    def _record(self, stage, seconds):
+        if self._page is not None:
+            self._page["stages"][stage] = self._page["stages"].get(stage, 0.0) + seconds
+
+    def _wrap(self, stage, func):
+        perf_counter = time.perf_counter
+        stack = self._stack
+
+        def wrapper(*args, **kwargs):
+            stack.append(0.0)
+            start = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                self._record(stage, elapsed - stack.pop())
+                if stack:
+                    stack[-1] += elapsed
+            if stage == "assemble" and self._page is not None:
+                self._page["nodes"] += count_nodes(result)
+            return result
+        return wrapper
+
+    def install(self):
+        for stage, (owner, name) in STAGES.items():
+            original = getattr(owner, name)
+            self._originals.append((owner, name, original))
+            setattr(owner, name, self._wrap(stage, original))
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    @contextmanager
+    def page(self, src, dest): # Time one page; whatever its stages don't account for is reported as io.
+        self._page = {"path": src, "stages": {}, "nodes": 0, "bytes": 0}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = self._page
+            record["total"] = time.perf_counter() - start
+            record["stages"]["io"] = max(0.0, record["total"] - sum(record["stages"].values()))
+            if os.path.exists(dest):
+                record["bytes"] = os.path.getsize(dest)
+            self.pages.append(record)
+            self._page = None
+
+    def totals(self):
+        totals = {"pages": len(self.pages), "total": 0.0, "nodes": 0, "bytes": 0, "stages": {}}
+        for record in self.pages:
+            totals["total"] += record["total"]
+            totals["nodes"] += record["nodes"]
+            totals["bytes"] += record["bytes"]
+            for stage, seconds in record["stages"].items():
+                totals["stages"][stage] = totals["stages"].get(stage, 0.0) + seconds
+        return totals
+
+    def slowest(self, top=10):
+        return sorted(self.pages, key=lambda record: record["total"], reverse=True)[:top]
+
+    def to_json(self, top=10):
+        return {"totals": self.totals(), "slowest": self.slowest(top)}
+
+    def report(self, top=10): # Human readable summary of the build and its slowest pages.
+        def row(label, stages, total):
+            cells = "".join(f"{stages.get(stage, 0.0) * 1000:>10.2f}" for stage in STAGE_ORDER)
+            return f"{label:<40.40}{cells}{total * 1000:>10.2f}"
+
+        totals = self.totals()
+        header = f"{'page (ms)':<40}" + "".join(f"{stage:>10}" for stage in STAGE_ORDER) + f"{'total':>10}"
+        lines = [header, row("ALL PAGES", totals["stages"], totals["total"])]
+        for record in self.slowest(top):
+            lines.append(row(record["path"], record["stages"], record["total"]))
+        lines.append(f"{totals['pages']} pages, {totals['nodes']} nodes, {totals['bytes']} bytes written")
+        return "\n".join(lines)
+
+
+def enable():
+    global _active
+    if _active is None:
+        _active = Profiler()
+        _active.install()
+    return _active
+
+
+def disable():
+    global _active
+    profiler = _active
+    if profiler is not None:
+        profiler.uninstall()
+        _active = None
+    return profiler
+
+
+def write_report(profiler, top=10, json_path=None): # Print the report and optionally save the JSON form.
+    print(profiler.report(top))
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(profiler.to_json(top), f, indent=1)
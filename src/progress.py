@@ -0,0 +1,29 @@
+import sys
+import time
+
+
+class Progress(): # A "label: done/total" line printed at most once per interval, instead of a line per file.
+    def __init__(self, label, total=None, interval=2.0, stream=None):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.reported = False
+        self.last = time.monotonic()
+
+    def update(self, count=1):
+        self.done += count
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.write()
+
+    def write(self):
+        total = f"/{self.total}" if self.total is not None else ""
+        print(f"{self.label}: {self.done}{total}", file=self.stream or sys.stdout, flush=True)
+        self.reported = True
+
+    def close(self): # Print the final count, but only if progress was shown at all; quick runs stay silent.
+        if self.reported:
+            self.write()
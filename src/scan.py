@@ -0,0 +1,22 @@
+import os
+
+
+def scan_pages(content_dir, dest_dir):
+    # Lazily yield (source, destination, DirEntry) for every markdown page under content_dir, in the
+    # order of a sorted os.walk: a directory's files, then each subdirectory in turn. Only one directory
+    # listing plus the not-yet-visited sibling directories are held at a time, and entry.stat() is cached
+    # by the DirEntry, so callers can check size and mtime without another stat call.
+    # Like os.walk, symlinks to directories are not followed.
+    pending = [(content_dir, "")]
+    while pending:
+        path, rel_dir = pending.pop()
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    subdirs.append((entry.path, os.path.join(rel_dir, entry.name)))
+            elif entry.name.endswith(".md"):
+                yield entry.path, os.path.join(dest_dir, rel_dir, entry.name[:-3] + ".html"), entry
+        pending.extend(reversed(subdirs))
@@ -0,0 +1,143 @@
+import json
+import os
+import re
+from src.manifest import load_manifest, save_manifest, MANIFEST_VERSION
+
+# Search index layout, written under <dest>/search/:
+#   meta.json      {"pages": {id: [title, url]}, "shards": [key, ...]}
+#   <key>.json     {term: [[page id, weight], ...]} sorted by weight, for terms whose shard_key is key
+# A browser loads meta.json once and then only the shards for the terms being searched.
+
+TERM_PATTERN = re.compile(r"\w{2,}")
+TITLE_WEIGHT = 10
+DEFAULT_SEARCH_STATE_PATH = os.path.join(".cache", "search.json")
+
+
+def add_terms(counter, text): # Count the searchable terms of a piece of text.
+    counter.update(TERM_PATTERN.findall(text.lower()))
+
+
+def shard_key(term): # Shard holding a term: its first two characters when they are ASCII letters/digits.
+    prefix = term[:2]
+    return prefix if prefix.isascii() and prefix.isalnum() else "_"
+
+
+def page_weights(title, terms): # Term weights of a page: occurrences, with a boost for title terms.
+    weights = dict(terms)
+    for term in TERM_PATTERN.findall(title.lower()):
+        weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+    return weights
+
+
+def page_url(dest, dest_dir, basepath="/"): # Public URL of an output file, with index.html folded into its directory.
+    rel_path = os.path.relpath(dest, dest_dir).replace(os.sep, "/")
+    if rel_path == "index.html":
+        rel_path = ""
+    elif rel_path.endswith("/index.html"):
+        rel_path = rel_path[:-len("index.html")]
+    return basepath + rel_path
+
+
+def empty_search_state():
+    return {"version": MANIFEST_VERSION, "next_id": 0, "pages": {}}
+
+
+class ShardSet(): # Lazily loaded shard files, so an update only touches the shards its terms live in.
+    def __init__(self, directory, start_empty=False):
+        self.directory = directory
+        self.start_empty = start_empty
+        self.shards = {}
+
+    def get(self, key):
+        if key not in self.shards:
+            self.shards[key] = {}
+            if not self.start_empty:
+                try:
+                    with open(os.path.join(self.directory, f"{key}.json")) as f:
+                        self.shards[key] = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self.shards[key]
+
+    def remove(self, page_id, terms):
+        for term in terms:
+            shard = self.get(shard_key(term))
+            postings = [posting for posting in shard.get(term, ()) if posting[0] != page_id]
+            if postings:
+                shard[term] = postings
+            else:
+                shard.pop(term, None)
+
+    def add(self, page_id, weights):
+        for term, weight in weights.items():
+            self.get(shard_key(term)).setdefault(term, []).append([page_id, weight])
+
+    def save(self): # Write every touched shard; shards left without terms are deleted.
+        os.makedirs(self.directory, exist_ok=True)
+        for key, shard in self.shards.items():
+            path = os.path.join(self.directory, f"{key}.json")
+            if not shard:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            for postings in shard.values():
+                postings.sort(key=lambda posting: (-posting[1], posting[0]))
+            with open(path, "w") as f:
+                json.dump(shard, f, separators=(",", ":"), sort_keys=True)
+
+
+def update_search_index(dest_dir, rendered, removed, basepath="/", state_path=DEFAULT_SEARCH_STATE_PATH, reset=False,
+                        live=None):
+    # Apply one build's changes to the search index. rendered maps a source to the dest, title
+    # and term counts of a page rendered in this build; removed lists sources that disappeared.
+    # live, when given, holds every source still in the site, so pages removed by builds that
+    # didn't update the index are dropped too.
+    # Only the shards holding terms of those pages are read and rewritten.
+    index_dir = os.path.join(dest_dir, "search")
+    meta_path = os.path.join(index_dir, "meta.json")
+    state = empty_search_state() if reset else load_manifest(state_path, empty=empty_search_state)
+    rebuild = reset or not os.path.exists(meta_path)
+    shards = ShardSet(index_dir, start_empty=rebuild)
+    pages = state["pages"]
+    if live is not None:
+        removed = sorted(set(removed) | (set(pages) - set(live)))
+    if not rendered and not removed and not rebuild:
+        return state # Nothing changed: leave meta.json and its mtime alone, so it isn't recompressed or re-uploaded
+
+    if rebuild:
+        # The published index is missing or being reset: rebuild every shard from the saved state.
+        for src, page in pages.items():
+            if src not in rendered and src not in removed:
+                shards.add(page["id"], page["weights"])
+
+    for src in removed:
+        page = pages.pop(src, None)
+        if page is not None and not rebuild:
+            shards.remove(page["id"], page["weights"])
+
+    for src, page in sorted(rendered.items()):
+        if page["terms"] is None:
+            raise ValueError(f"{src} was rendered without collecting search terms")
+        old = pages.get(src)
+        if old is None:
+            page_id = state["next_id"]
+            state["next_id"] += 1
+        else:
+            page_id = old["id"]
+            if not rebuild:
+                shards.remove(page_id, old["weights"])
+        weights = page_weights(page["title"], page["terms"])
+        shards.add(page_id, weights)
+        pages[src] = {"id": page_id, "title": page["title"], "url": page_url(page["dest"], dest_dir, basepath),
+                      "weights": weights}
+
+    from src.feeds import write_if_changed # Imported here: src.feeds imports this module through src.pageindex
+    shards.save()
+    existing = sorted(name[:-5] for name in os.listdir(index_dir) if name.endswith(".json") and name != "meta.json")
+    write_if_changed(meta_path, json.dumps({
+        "pages": {page["id"]: [page["title"], page["url"]] for page in pages.values()},
+        "shards": existing,
+    }, separators=(",", ":"), sort_keys=True))
+    save_manifest(state_path, state)
+    print(f"Search index: {len(rendered)} pages updated, {len(removed)} removed, {len(shards.shards)} shards rewritten")
+    return state
@@ -0,0 +1,154 @@
+import functools
+import os
+import shutil
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from src.assets import sync_assets, fingerprint_template, DEFAULT_ASSET_MANIFEST_PATH
+from src.build import collect_pages, render_jobs, report_failures
+from src.converts import generate_page, set_asset_urls
+from src.template import Template, load_template
+
+
+def snapshot(root): # Map every file under root to its (mtime_ns, size).
+    state = {}
+    if os.path.isfile(root):
+        st = os.stat(root)
+        return {root: (st.st_mtime_ns, st.st_size)}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            state[path] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def diff_snapshots(old, new): # Return (changed_or_added, removed) paths between two snapshots.
+    changed = sorted(path for path, stamp in new.items() if old.get(path) != stamp)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+def page_dest(src, content_dir, dest_dir): # Output path of a markdown source, matching collect_pages.
+    rel_path = os.path.relpath(src, content_dir)
+    return os.path.join(dest_dir, rel_path[:-3] + ".html")
+
+
+def remove_if_exists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class Watcher(): # Polls content, static and template for changes and rebuilds only what they affect.
+    # With fingerprint=True, asset_urls is the map from the initial sync_assets run; static changes are
+    # re-synced under hashed names and re-render every page when the map changes.
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath="/", workers=1, fingerprint=False,
+                 asset_urls=None, asset_mode="copy", asset_manifest_path=DEFAULT_ASSET_MANIFEST_PATH):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.workers = workers
+        self.fingerprint = fingerprint
+        self.asset_urls = asset_urls or {}
+        self.asset_mode = asset_mode
+        self.asset_manifest_path = asset_manifest_path
+        self.snapshots = {root: snapshot(root) for root in self.roots()}
+
+    def roots(self):
+        return (self.content_dir, self.static_dir, self.template_path)
+
+    def poll(self): # Check every root once and apply any changes; returns the number of outputs touched.
+        touched = 0
+        for root in self.roots():
+            new = snapshot(root)
+            changed, removed = diff_snapshots(self.snapshots[root], new)
+            self.snapshots[root] = new
+            if not changed and not removed:
+                continue
+            start = time.perf_counter()
+            if root == self.template_path:
+                count = self.rebuild_all()
+                what = "template change"
+            elif root == self.content_dir:
+                count = self.apply_content(changed, removed)
+                what = f"{len(changed) + len(removed)} content change(s)"
+            else:
+                count = self.apply_static(changed, removed)
+                what = f"{len(changed) + len(removed)} static change(s)"
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt {count} output(s) for {what} in {elapsed:.1f} ms")
+            touched += count
+        return touched
+
+    def template(self): # The page template, with asset references rewritten when fingerprinting.
+        template = load_template(self.template_path)
+        if self.asset_urls:
+            template = Template(fingerprint_template(template.source, self.asset_urls))
+        return template
+
+    def rebuild_all(self):
+        jobs = collect_pages(self.content_dir, self.dest_dir)
+        failures = report_failures(render_jobs(jobs, self.template(), self.basepath, self.workers,
+                                               asset_urls=self.asset_urls))
+        return len(jobs) - len(failures)
+
+    def apply_content(self, changed, removed):
+        count = 0
+        template = self.template()
+        set_asset_urls(self.asset_urls)
+        for src in changed:
+            if not src.endswith(".md"):
+                continue
+            try:
+                generate_page(src, self.template_path, page_dest(src, self.content_dir, self.dest_dir), self.basepath, template=template)
+                count += 1
+            except Exception as e:
+                print(f"Failed to render {src}: {type(e).__name__}: {e}")
+        for src in removed:
+            if src.endswith(".md"):
+                remove_if_exists(page_dest(src, self.content_dir, self.dest_dir))
+                count += 1
+        return count
+
+    def apply_static(self, changed, removed):
+        if self.fingerprint:
+            stats = sync_assets(self.static_dir, self.dest_dir, self.asset_manifest_path, mode=self.asset_mode,
+                                fingerprint=True)
+            if stats["urls"] == self.asset_urls:
+                return len(changed) + len(removed)
+            self.asset_urls = stats["urls"]
+            return len(changed) + len(removed) + self.rebuild_all()
+        for src in changed:
+            dest = os.path.join(self.dest_dir, os.path.relpath(src, self.static_dir))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copy2(src, dest)
+        for src in removed:
+            remove_if_exists(os.path.join(self.dest_dir, os.path.relpath(src, self.static_dir)))
+        return len(changed) + len(removed)
+
+
+def start_server(directory, port=8888): # Serve directory over HTTP on a background thread.
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Serving {directory} on http://localhost:{port}/")
+    return server
+
+
+def watch_and_serve(watcher, port=8888, interval=0.5): # Serve the output directory and rebuild on changes until interrupted.
+    server = start_server(watcher.dest_dir, port)
+    print(f"Watching {', '.join(watcher.roots())} for changes")
+    try:
+        while True:
+            time.sleep(interval)
+            watcher.poll()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+from src.assets import collect_assets, is_up_to_date, place_file
+from src.manifest import load_manifest, save_manifest, MANIFEST_VERSION
+
+# A sharded build splits the content tree into N deterministic shards. Each shard K is built
+# (possibly on another machine) into <shard dir>/<K>/ with its own docs/, manifest and pending
+# stats, and a final merge step gathers every shard's output and page metadata into docs/.
+
+DEFAULT_SHARD_DIR = os.path.join(".cache", "shards")
+SHARD_STRATEGIES = ("hash", "size")
+
+
+def shard_path(shard_dir, index): # Directory holding shard index's output, manifest and pending stats.
+    return os.path.join(shard_dir, str(index))
+
+
+def hash_shard(rel_path, count): # Shard of a page by the hash of its content-relative path; stable as the tree grows.
+    digest = hashlib.sha1(rel_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def assign_shards(jobs, content_dir, count, strategy="hash"):
+    # Map each job's source to a shard. "hash" keeps a page on the same shard across builds;
+    # "size" balances source bytes (largest first onto the lightest shard) but moves pages as the tree changes.
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+    if strategy == "hash":
+        return {src: hash_shard(os.path.relpath(src, content_dir), count) for src, _ in jobs}
+    sized = sorted(((os.path.getsize(src), src) for src, _ in jobs), key=lambda item: (-item[0], item[1]))
+    loads = [0] * count
+    shards = {}
+    for size, src in sized:
+        index = min(range(count), key=lambda i: (loads[i], i))
+        shards[src] = index
+        loads[index] += size
+    return shards
+
+
+def select_shard(jobs, content_dir, shard, strategy="hash"): # The jobs belonging to shard (index, count).
+    index, count = shard
+    shards = assign_shards(jobs, content_dir, count, strategy)
+    return [job for job in jobs if shards[job[0]] == index]
+
+
+def empty_shard_stats():
+    return {"version": MANIFEST_VERSION, "pages": {}, "removed_sources": [], "refs": {}, "failed": []}
+
+
+def save_shard_stats(shard_root, stats, reset=False):
+    # Fold one shard build's stats into the ones waiting for the next merge, so a shard can be
+    # rebuilt several times in between without losing pages rendered by the earlier runs.
+    path = os.path.join(shard_root, "stats.json")
+    pending = empty_shard_stats() if reset else load_manifest(path, empty=empty_shard_stats)
+    removed = set(pending["removed_sources"])
+    for src in stats["removed_sources"]:
+        pending["pages"].pop(src, None)
+        removed.add(src)
+    for src, page in stats["pages"].items():
+        pending["pages"][src] = page
+        removed.discard(src)
+    pending["removed_sources"] = sorted(removed)
+    pending["refs"] = stats["refs"]
+    pending["failed"] = stats["failed"]
+    save_manifest(path, pending)
+    return pending
+
+
+def merge_shards(shard_dir, count, dest_dir, mode="copy"):
+    # Place every shard's output in dest_dir, remove outputs no shard produces any more, and
+    # combine the shards' pending stats into the stats a single build would have returned.
+    merge_manifest_path = os.path.join(shard_dir, "merged.json")
+    previous = load_manifest(merge_manifest_path, empty=lambda: {"version": MANIFEST_VERSION, "files": {}})["files"]
+    files = {}
+    stats = {"rendered": 0, "skipped": 0, "removed": 0, "failed": [], "pages": {}, "removed_sources": [], "refs": {}}
+    placed = 0
+
+    for index in range(count):
+        root = shard_path(shard_dir, index)
+        out_dir = os.path.join(root, "docs")
+        stats_path = os.path.join(root, "stats.json")
+        if not os.path.exists(stats_path):
+            raise FileNotFoundError(f"Shard {index} of {count} has not been built into {root}")
+        for rel_path in collect_assets(out_dir) if os.path.isdir(out_dir) else ():
+            files[rel_path] = index
+            src = os.path.join(out_dir, rel_path)
+            dest = os.path.join(dest_dir, rel_path)
+            if is_up_to_date(os.stat(src), dest, src):
+                continue
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            place_file(src, dest, mode)
+            placed += 1
+
+        pending = load_manifest(stats_path, empty=empty_shard_stats)
+        for src, page in pending["pages"].items():
+            stats["pages"][src] = dict(page, dest=os.path.join(dest_dir, os.path.relpath(page["dest"], out_dir)))
+        stats["removed_sources"].extend(pending["removed_sources"])
+        stats["refs"].update(pending["refs"])
+        stats["failed"].extend(tuple(failure) for failure in pending["failed"])
+        # The merge has consumed this shard's rendered and removed pages.
+        save_manifest(stats_path, dict(pending, pages={}, removed_sources=[]))
+
+    for rel_path in previous:
+        if rel_path not in files:
+            dest = os.path.join(dest_dir, rel_path)
+            if os.path.exists(dest):
+                os.remove(dest)
+                stats["removed"] += 1
+    save_manifest(merge_manifest_path, {"version": MANIFEST_VERSION, "files": files})
+
+    # A page that moved between shards shows up as removed by one and rendered by another.
+    stats["removed_sources"] = sorted(set(stats["removed_sources"]) - set(stats["pages"]) - set(stats["refs"]))
+    stats["rendered"] = len(stats["pages"])
+    stats["skipped"] = len(stats["refs"]) - stats["rendered"]
+    print(f"Merged {count} shards: {placed} files placed, {stats['removed']} removed, "
+          f"{stats['rendered']} pages rendered since the last merge, {len(stats['failed'])} failed")
+    return stats
@@ -1,7 +1,9 @@
 from src.nodes import TextNode, TextType
 import re
 
-
+# Compiled once at import; every function below uses these instead of passing pattern strings to re.
+IMAGE_PATTERN = re.compile(r'!\[([^\]]+)\]\(([^)]+)\)')
+LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type): # Split nodes based on a delimiter and assign a text type to the split parts.
@@ -29,16 +31,13 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type): # Split nodes based
     return new_nodes
 
 def extract_markdown_images(text): # Extract images from markdown text.
-    pattern = r'!\[([^\]]+)\]\(([^)]+)\)'
-    return re.findall(pattern, text)
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text): # Extract links from markdown text.
-    pattern = r"\[([^\]]+)\]\(([^)]+)\)"
-    return re.findall(pattern, text)  
+    return LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
     new_nodes = []
-    pattern = r'!\[([^\]]+)\]\(([^)]+)\)'
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -46,7 +45,7 @@ def split_nodes_image(old_nodes):
             continue
 
         text = node.text
-        matches = list(re.finditer(pattern, text))
+        matches = list(IMAGE_PATTERN.finditer(text))
 
         if not matches:
             new_nodes.append(node)
@@ -74,7 +73,6 @@ def split_nodes_image(old_nodes):
     
 def split_nodes_link(old_nodes):
     new_nodes = []
-    pattern = r'\[([^\]]+)\]\(([^)]+)\)'
 
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -82,7 +80,7 @@ def split_nodes_link(old_nodes):
             continue
 
         text = node.text
-        matches = list(re.finditer(pattern, text))
+        matches = list(LINK_PATTERN.finditer(text))
 
         if not matches:
             new_nodes.append(node)
@@ -104,4 +102,73 @@ def split_nodes_link(old_nodes):
         if last_index < len(text):
             new_nodes.append(TextNode(text[last_index:], TextType.TEXT))
 
-    return new_nodes
\ No newline at end of file
+    return new_nodes
+
+# Delimiters in the order the chained split_nodes_delimiter passes applied them.
+INLINE_DELIMITERS = (
+    ("**", TextType.BOLD),
+    ("*", TextType.ITALIC),
+    ("_", TextType.ITALIC),
+    ("`", TextType.CODE),
+)
+
+
+def _emit_delimited(text, level, out): # Split text on the remaining delimiters and append the resulting nodes to out.
+    while level < len(INLINE_DELIMITERS):
+        delimiter, text_type = INLINE_DELIMITERS[level]
+        if delimiter in text:
+            break
+        level += 1
+    else:
+        if text:
+            out.append(TextNode(text, TextType.TEXT))
+        return
+
+    parts = text.split(delimiter)
+    if len(parts) % 2 == 0:
+        raise ValueError("Unmatched delimiters in text: " + text)
+
+    for i, part in enumerate(parts):
+        if part == "":
+            continue
+        if i % 2 == 0:
+            _emit_delimited(part, level + 1, out)
+        else:
+            out.append(TextNode(part, text_type))
+
+
+def _emit_links(text, out): # Emit links found in text, passing the plain runs between them on to the delimiter splitter.
+    if "[" not in text:
+        _emit_delimited(text, 0, out)
+        return
+
+    last_index = 0
+    for match in LINK_PATTERN.finditer(text):
+        start, end = match.span()
+        if start > last_index:
+            _emit_delimited(text[last_index:start], 0, out)
+        out.append(TextNode(match.group(1), TextType.LINK, url=match.group(2)))
+        last_index = end
+    if last_index < len(text):
+        _emit_delimited(text[last_index:], 0, out)
+
+
+def tokenize_inline(text):
+    # Single pass over an inline string producing the same TextNode sequence as running
+    # split_nodes_image, split_nodes_link and the four split_nodes_delimiter passes in turn,
+    # without building an intermediate node list per pass.
+    out = []
+    if "![" not in text:
+        _emit_links(text, out)
+        return out
+
+    last_index = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        start, end = match.span()
+        if start > last_index:
+            _emit_links(text[last_index:start], out)
+        out.append(TextNode(match.group(1), TextType.IMAGE, url=match.group(2)))
+        last_index = end
+    if last_index < len(text):
+        _emit_links(text[last_index:], out)
+    return out
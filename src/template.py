@@ -0,0 +1,70 @@
+import hashlib
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+_template_cache = {} # path -> (mtime_ns, size, Template)
+
+
+class Template(): # A template parsed once into literal text segments and {{ Name }} placeholder slots.
+    def __init__(self, source):
+        self.source = source
+        self.digest = hashlib.sha1(source.encode()).hexdigest() # Identifies the template in page output keys
+        self.segments = [] # (is_slot, text) pairs; text is the variable name for slots
+        last_index = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > last_index:
+                self.segments.append((False, source[last_index:match.start()]))
+            self.segments.append((True, match.group(1)))
+            last_index = match.end()
+        if last_index < len(source):
+            self.segments.append((False, source[last_index:]))
+
+    def slots(self): # Names of all placeholders used by the template.
+        return {text for is_slot, text in self.segments if is_slot}
+
+    def _resolve(self, name, context):
+        value = context.get(name)
+        if value is None:
+            return "{{ " + name + " }}" # Unknown placeholders are left as they were
+        return value
+
+    def render(self, context): # Render to a string with a single join.
+        parts = []
+        for is_slot, text in self.segments:
+            if not is_slot:
+                parts.append(text)
+                continue
+            value = self._resolve(text, context)
+            parts.append(value.to_html() if hasattr(value, "to_html") else str(value))
+        return "".join(parts)
+
+    def write(self, out, context): # Stream to a file-like object; HTML nodes in the context are written with write_html.
+        write = out.write
+        for is_slot, text in self.segments:
+            if not is_slot:
+                write(text)
+                continue
+            value = self._resolve(text, context)
+            if hasattr(value, "write_html"):
+                value.write_html(out)
+            else:
+                write(str(value))
+
+    def __eq__(self, other):
+        return isinstance(other, Template) and self.source == other.source
+
+    def __repr__(self):
+        return f"Template({len(self.segments)} segments, slots={sorted(self.slots())})"
+
+
+def load_template(path): # Return the parsed template at path, re-parsing only when its mtime or size changed.
+    st = os.stat(path)
+    cached = _template_cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(path, "r") as f:
+        template = Template(f.read())
+    _template_cache[path] = (st.st_mtime_ns, st.st_size, template)
+    return template
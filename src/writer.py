@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+
+
+class OutputWriter(): # Writes rendered pages on background threads, fed through a bounded queue.
+    # submit() blocks while max_pending pages are waiting, which keeps memory bounded when
+    # rendering outpaces the disk. With fsync=True, files are staged and committed in batches:
+    # fsync every staged file, rename them into place, then fsync each touched directory once.
+    def __init__(self, threads=4, max_pending=64, fsync=False, fsync_batch=32):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.fsync = fsync
+        self.fsync_batch = fsync_batch
+        self.written = 0
+        self.unchanged = 0
+        self.bytes_written = 0
+        self.errors = []
+        self._made_dirs = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, threads))]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, path, data): # Queue bytes to be written to path.
+        if self._closed:
+            raise ValueError("OutputWriter is closed")
+        self.queue.put((path, data))
+
+    def _ensure_dir(self, directory): # makedirs once per directory instead of once per page.
+        if directory in self._made_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._made_dirs.add(directory)
+
+    def _run(self):
+        staged = []
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            path, data = item
+            try:
+                pending = self._write(path, data)
+            except OSError as e:
+                self._error(path, e)
+                continue
+            if pending is not None:
+                staged.append(pending)
+                if len(staged) >= self.fsync_batch:
+                    self._commit(staged)
+                    staged = []
+        if staged:
+            self._commit(staged)
+
+    def _error(self, path, e):
+        with self._lock:
+            self.errors.append((path, f"{type(e).__name__}: {e}"))
+
+    def _write(self, path, data): # Write path unless it already holds data; returns a staged (tmp, path) pair in fsync mode.
+        self._ensure_dir(os.path.dirname(path))
+        if same_contents(path, data):
+            with self._lock:
+                self.unchanged += 1
+            return None
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            self.bytes_written += len(data)
+        if self.fsync:
+            return (tmp_path, path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.written += 1
+        return None
+
+    def _commit(self, staged):
+        directories = set()
+        for tmp_path, path in staged:
+            try:
+                fsync_path(tmp_path)
+                os.replace(tmp_path, path)
+                directories.add(os.path.dirname(path))
+            except OSError as e:
+                self._error(path, e)
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                continue
+            with self._lock:
+                self.written += 1
+        for directory in directories:
+            try:
+                fsync_path(directory)
+            except OSError:
+                pass # Not every platform allows opening a directory for fsync
+
+    def close(self): # Wait for every queued page to be written; returns the (path, error) failures.
+        if not self._closed:
+            self._closed = True
+            for _ in self._threads:
+                self.queue.put(None)
+            for thread in self._threads:
+                thread.join()
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PageBuffer(): # Stand-in writer for pool workers: keeps rendered pages for the parent's OutputWriter.
+    def __init__(self):
+        self.pages = []
+
+    def submit(self, path, data):
+        self.pages.append((path, data))
+
+    def drain(self):
+        pages, self.pages = self.pages, []
+        return pages
+
+
+def same_contents(path, data): # True if the file at path already holds exactly data.
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -1,3 +1,2 @@
 #!/bin/bash
-python3 -m unittest -v tests.test_htmlnode
-
+python3 -m unittest discover -v -s tests -t .
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import assets
+from src.assets import sync_assets, fingerprinted_name, fingerprint_url, fingerprint_template
+from src.build import build_site
+from src.converts import set_asset_urls
+
+
+class TestSyncAssets(unittest.TestCase): # Tests for incremental static asset sync
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.manifest = os.path.join(self.root, "assets.json")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        return sync_assets(self.static, self.dest, manifest_path=self.manifest, **kwargs)
+
+    def test_first_sync_copies_everything(self):
+        stats = self.sync()
+        self.assertEqual(stats["copy"], 2)
+        self.assertEqual(stats["bytes_copied"], len("body {}") + len("png-bytes"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+
+    def test_second_sync_skips_unchanged(self):
+        self.sync()
+        stats = self.sync()
+        self.assertEqual(stats["copy"], 0)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(stats["bytes_skipped"], len("body {}") + len("png-bytes"))
+
+    def test_changed_file_copied(self):
+        self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(self.sync()["copy"], 1)
+
+    def test_deleted_asset_removed(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(self.sync()["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+
+    def test_checksum_skips_touched_identical_file(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 0))
+        self.assertEqual(self.sync(checksum=True)["skipped"], 2)
+
+    def test_hardlink_mode(self):
+        stats = self.sync(mode="hardlink")
+        self.assertEqual(stats["hardlink"], 2)
+        self.assertTrue(os.path.samefile(os.path.join(self.static, "index.css"), os.path.join(self.dest, "index.css")))
+
+    def test_fingerprinted_names(self):
+        stats = self.sync(fingerprint=True)
+        css = stats["urls"]["index.css"]
+        self.assertRegex(css, r"^index\.[0-9a-f]{10}\.css$")
+        self.assertRegex(stats["urls"]["images/a.png"], r"^images/a\.[0-9a-f]{10}\.png$")
+        self.assertTrue(os.path.exists(os.path.join(self.dest, css)))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+        self.assertEqual(fingerprinted_name("a/b.js", "0123456789abcdef"), "a/b.0123456789.js")
+
+    def test_unchanged_assets_not_rehashed(self):
+        self.sync(fingerprint=True)
+        with mock.patch.object(assets, "hash_file", wraps=assets.hash_file) as hashed:
+            self.sync(fingerprint=True)
+            self.assertEqual(hashed.call_count, 0)
+            self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+            self.sync(fingerprint=True)
+            self.assertEqual(hashed.call_count, 1)
+
+    def test_changed_asset_replaces_old_fingerprint(self):
+        old = self.sync(fingerprint=True)["urls"]["index.css"]
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        stats = self.sync(fingerprint=True)
+        self.assertNotEqual(stats["urls"]["index.css"], old)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, old)))
+
+    def test_fingerprint_url(self):
+        urls = {"images/a.png": "images/a.123.png"}
+        self.assertEqual(fingerprint_url("/images/a.png", urls), "/images/a.123.png")
+        self.assertEqual(fingerprint_url("images/a.png?v=1#x", urls), "images/a.123.png?v=1#x")
+        self.assertEqual(fingerprint_url("/images/b.png", urls), "/images/b.png")
+        self.assertEqual(fingerprint_template('<link href="{{ BasePath }}/index.css">', {"index.css": "index.1.css"}),
+                         '<link href="{{ BasePath }}/index.1.css">')
+
+    def test_build_rewrites_template_and_page_urls(self):
+        urls = self.sync(fingerprint=True)["urls"]
+        content = os.path.join(self.root, "content")
+        template = os.path.join(self.root, "template.html")
+        self.write(template, '<link href="{{ BasePath }}index.css">{{ Content }}')
+        self.write(os.path.join(content, "index.md"), "# Home\n\n![a](images/a.png) [css](index.css) [home](/)")
+        try:
+            build_site(content, template, self.dest, "/", manifest_path=os.path.join(self.root, "manifest.json"),
+                       asset_urls=urls)
+        finally:
+            set_asset_urls(None)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            html = f.read()
+        self.assertIn(f'href="/{urls["index.css"]}"', html)
+        self.assertIn(f'src="/{urls["images/a.png"]}"', html)
+        self.assertIn('href="//"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
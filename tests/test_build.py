@@ -0,0 +1,301 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from src import build
+from src.build import build_site, collect_pages, iter_render_jobs
+from src.converts import generate_pages_recursive
+from src.progress import Progress
+from src.scan import scan_pages
+from src.template import load_template
+from src.depgraph import affected_pages, page_dependencies
+from src.manifest import load_manifest
+
+
+_render_chunk = build._render_chunk_in_worker
+
+
+def _crash_on_post(chunk): # Pool worker that dies outright when it gets the blog post, as an OOM kill would.
+    if any("post" in job[0] for job in chunk):
+        os._exit(1)
+    return _render_chunk(chunk)
+
+
+class TestIncrementalBuild(unittest.TestCase): # Tests for the manifest-driven incremental build
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, "manifest.json")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nWorld")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, **kwargs):
+        return build_site(self.content, self.template, self.dest, "/", manifest_path=self.manifest, **kwargs)
+
+    def test_collect_pages(self):
+        jobs = collect_pages(self.content, self.dest)
+        self.assertEqual(jobs, [
+            (os.path.join(self.content, "index.md"), os.path.join(self.dest, "index.html")),
+            (os.path.join(self.content, "blog", "post", "index.md"), os.path.join(self.dest, "blog", "post", "index.html")),
+        ])
+
+    def test_second_build_skips_unchanged(self):
+        self.assertEqual(self.build()["rendered"], 2)
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 0)
+        self.assertEqual(stats["skipped"], 2)
+
+    def test_only_changed_page_rerendered(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        self.assertEqual(self.build()["rendered"], 1)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn("Hello again", f.read())
+
+    def test_identical_output_not_rewritten(self):
+        self.build()
+        home = os.path.join(self.dest, "index.html")
+        os.utime(home, ns=(0, 0))
+        self.write(os.path.join(self.content, "index.md"), "\n# Home\n\n\n\n  Hello\n\n")
+        stats = self.build()
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (1, 1))
+        self.assertEqual(stats["pages"], {})
+        self.assertEqual(os.stat(home).st_mtime_ns, 0)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello!")
+        stats = self.build()
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (1, 0))
+        self.assertNotEqual(os.stat(home).st_mtime_ns, 0)
+
+    def test_template_change_rerenders_all(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build()["rendered"], 2)
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertEqual(self.build()["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+
+    def test_force_rebuilds_everything(self):
+        self.build()
+        self.assertEqual(self.build(force=True)["rendered"], 2)
+
+    def test_parallel_matches_serial(self):
+        self.build(workers=1)
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            serial = f.read()
+        self.build(force=True, workers=2)
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertEqual(f.read(), serial)
+
+    def test_jobs_rendered_as_they_are_generated(self):
+        consumed = []
+
+        def jobs():
+            for job in collect_pages(self.content, self.dest):
+                consumed.append(job[0])
+                yield job
+
+        results = iter_render_jobs(jobs(), 2, load_template(self.template))
+        self.assertEqual(next(results)[1], None)
+        self.assertEqual(len(consumed), 1)
+        self.assertEqual(len(list(results)), 1)
+        self.assertEqual(len(consumed), 2)
+
+    def test_broken_pool_renders_remaining_jobs(self):
+        self.build()
+        for name in ("a", "b", "c", "d"):
+            self.write(os.path.join(self.content, name, "index.md"), f"# {name}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nNew")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nNew")
+        with mock.patch("src.build._render_chunk_in_worker", _crash_on_post):
+            stats = self.build(workers=2)
+        self.assertEqual((stats["rendered"], stats["failed"]), (6, []))
+        for rel_path in ("index.html", os.path.join("blog", "post", "index.html"), os.path.join("d", "index.html")):
+            with open(os.path.join(self.dest, rel_path)) as f:
+                self.assertNotIn("World", f.read())
+        self.assertEqual(self.build()["rendered"], 0)
+
+    def test_failed_page_reported_and_retried(self):
+        self.write(os.path.join(self.content, "broken.md"), "no title here")
+        stats = self.build(workers=2)
+        self.assertEqual([src for src, _ in stats["failed"]], [os.path.join(self.content, "broken.md")])
+        self.assertEqual(stats["rendered"], 2)
+        self.assertEqual(len(self.build()["failed"]), 1)
+
+
+class TestDependencyGraph(unittest.TestCase): # Tests for dependency-driven invalidation between pages, assets and templates
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, "manifest.json")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.home = os.path.join(self.content, "index.md")
+        self.write(self.home, "# Home\n\n![a](/images/a.png) [post](/blog/post)")
+        self.write(os.path.join(self.content, "other", "index.md"), "# Other")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        return build_site(self.content, self.template, os.path.join(self.root, "docs"), "/",
+                          manifest_path=self.manifest, static_dir=self.static)
+
+    def test_page_dependencies(self):
+        deps = page_dependencies([("image", "/images/a.png"), ("link", "/blog/post"), ("link", "https://x.org")],
+                                 "content", "static")
+        self.assertEqual(deps["assets"], [os.path.join("static", "images", "a.png")])
+        self.assertEqual(deps["links"], [os.path.join("content", "blog", "post.md"),
+                                         os.path.join("content", "blog", "post", "index.md")])
+
+    def test_asset_change_rebuilds_only_referencing_page(self):
+        self.build()
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        self.assertEqual(self.build()["rendered"], 1)
+
+    def test_new_linked_page_rebuilds_linking_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.assertEqual(self.build()["rendered"], 2)
+
+    def test_template_change_rebuilds_all(self):
+        self.build()
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.assertEqual(self.build()["rendered"], 2)
+
+    def test_template_path_change_rebuilds_all(self):
+        self.build()
+        other = os.path.join(self.root, "other.html")
+        self.write(other, "<main>{{ Content }}</main>")
+        stats = build_site(self.content, other, os.path.join(self.root, "docs"), "/",
+                           manifest_path=self.manifest, static_dir=self.static)
+        self.assertEqual(stats["rendered"], 2)
+        with open(os.path.join(self.root, "docs", "index.html")) as f:
+            self.assertTrue(f.read().startswith("<main>"))
+        self.write(other, "<article>{{ Content }}</article>")
+        self.assertEqual(build_site(self.content, other, os.path.join(self.root, "docs"), "/",
+                                    manifest_path=self.manifest, static_dir=self.static)["rendered"], 2)
+
+    def test_affected_pages_query(self):
+        self.build()
+        manifest = load_manifest(self.manifest)
+        self.assertEqual(affected_pages(manifest, os.path.join(self.static, "images", "a.png")), [self.home])
+        self.assertEqual(len(affected_pages(manifest, self.template)), 2)
+
+    def test_affected_pages_match_build(self):
+        self.build()
+        other = os.path.join(self.content, "other", "index.md")
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        changes = [
+            (other, lambda: self.write(other, "# Other\n\nEdited")),
+            (post, lambda: self.write(post, "# Post")),
+            (post, lambda: self.write(post, "# Post\n\nEdited")),
+            (post, lambda: os.remove(post)),
+            (os.path.join(self.static, "images", "a.png"), lambda: self.write(os.path.join(self.static, "images", "a.png"), "new")),
+        ]
+        for path, change in changes:
+            change()
+            predicted = affected_pages(load_manifest(self.manifest), path)
+            stats = self.build()
+            # Linking pages re-render when a page appears, but their output is identical, so they aren't in pages.
+            self.assertEqual(stats["rendered"], len(predicted), path)
+            self.assertLessEqual(set(stats["pages"]), set(predicted), path)
+
+
+class TestScanPages(unittest.TestCase): # Tests for the streaming content walk and the progress reporter
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.pages = os.path.join(self.root, "pages") # Not named content/, on purpose
+        self.dest = os.path.join(self.root, "site")
+        for rel_path in ("b.md", "a.md", "notes.txt", os.path.join("z", "index.md"), os.path.join("c", "d", "e.md"),
+                         os.path.join("c", "x.md"), os.path.join("empty", "readme.txt")):
+            self.write(os.path.join(self.pages, rel_path), f"# {rel_path}\n\nText")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def write_template(self):
+        path = os.path.join(self.root, "template.html")
+        self.write(path, "{{ Content }}")
+        return path
+
+    def test_order_matches_sorted_walk(self):
+        expected = []
+        for root, dirs, files in os.walk(self.pages):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".md"):
+                    src = os.path.join(root, name)
+                    expected.append((src, os.path.join(self.dest, os.path.relpath(src, self.pages)[:-3] + ".html")))
+        scanned = [(src, dest) for src, dest, _ in scan_pages(self.pages, self.dest)]
+        self.assertEqual(scanned, expected)
+        self.assertEqual([os.path.relpath(src, self.pages) for src, _ in scanned],
+                         ["a.md", "b.md", os.path.join("c", "x.md"), os.path.join("c", "d", "e.md"), os.path.join("z", "index.md")])
+
+    def test_entries_carry_stat(self):
+        for src, _, entry in scan_pages(self.pages, self.dest):
+            self.assertEqual(entry.stat().st_size, os.stat(src).st_size)
+
+    def test_scan_is_lazy(self):
+        with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            next(scan_pages(self.pages, self.dest))
+        self.assertEqual(scandir.call_count, 1)
+
+    def test_generate_pages_from_any_root(self):
+        generate_pages_recursive(self.pages, self.write_template(), self.dest)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "c", "d", "e.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "z", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "notes.txt")))
+
+    def test_build_site_from_any_root(self):
+        stats = build_site(self.pages, self.write_template(), self.dest, "/", manifest_path=os.path.join(self.root, "m.json"))
+        self.assertEqual(stats["rendered"], 5)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "a.html")))
+
+    def test_progress_is_rate_limited(self):
+        out = io.StringIO()
+        with mock.patch("time.monotonic", side_effect=[0.0] + [0.5 * i for i in range(1, 11)]):
+            progress = Progress("Rendered", 10, interval=2.0, stream=out)
+            for _ in range(10):
+                progress.update()
+        progress.close()
+        self.assertEqual(out.getvalue().splitlines(), ["Rendered: 4/10", "Rendered: 8/10", "Rendered: 10/10"])
+
+    def test_quick_progress_stays_silent(self):
+        out = io.StringIO()
+        progress = Progress("Rendered", 3, interval=60, stream=out)
+        for _ in range(3):
+            progress.update()
+        progress.close()
+        self.assertEqual(out.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
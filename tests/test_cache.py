@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site
+from src.cache import BlockCache
+from src.converts import markdown_to_html_node, PageFacts
+
+MARKDOWN = "# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n\n```\ncode\n```\n\n> quote"
+
+
+class TestBlockCache(unittest.TestCase): # Tests for the block-level render cache
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN, "/b/").to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, "/b/", cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, "/b/", cache).to_html(), expected)
+        self.assertEqual(cache.stats()["misses"], 5)
+        self.assertEqual(cache.stats()["hits"], 5)
+
+    def test_basepath_is_part_of_key(self):
+        cache = BlockCache()
+        markdown_to_html_node("[link](/x)", "/a/", cache)
+        self.assertIn('href="/b//x"', markdown_to_html_node("[link](/x)", "/b/", cache).to_html())
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2", [("link", "/x")])
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_byte_bound(self):
+        cache = BlockCache(max_bytes=5)
+        cache.put("a", "xxx")
+        cache.put("b", "yyy")
+        self.assertEqual(list(cache.entries), ["b"])
+        self.assertEqual(cache.bytes, 3)
+
+    def test_byte_bound_counts_refs_and_terms(self):
+        cache = BlockCache(max_bytes=40)
+        cache.put("a", "x", [("link", "/about")], {"hello": 1})
+        self.assertEqual(cache.bytes, 1 + (4 + 6 + 8) + (5 + 8))
+        cache.put("b", "y", [("link", "/about")], {"hello": 1})
+        self.assertEqual(list(cache.entries), ["b"])
+
+    def test_subset_keeps_most_recent_entries(self):
+        cache = BlockCache()
+        for key in "abcd":
+            cache.put(key, "xxx")
+        cache.get("a")
+        subset = cache.subset(7)
+        self.assertEqual(list(subset.entries), ["d", "a"])
+        self.assertEqual(subset.bytes, 6)
+        self.assertEqual(len(cache.entries), 4)
+
+    def test_refs_and_terms_reported_on_hit(self):
+        cache = BlockCache()
+        first, second = PageFacts(collect_terms=True), PageFacts(collect_terms=True)
+        markdown_to_html_node("[a](/x) ![b](/y.png) word word", "/", cache, first)
+        markdown_to_html_node("[a](/x) ![b](/y.png) word word", "/", cache, second)
+        self.assertEqual(first.refs, [("link", "/x"), ("image", "/y.png")])
+        self.assertEqual(second.refs, first.refs)
+        self.assertEqual(first.terms["word"], 2)
+        self.assertEqual(second.terms, first.terms)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "blocks.json")
+            cache = BlockCache()
+            markdown_to_html_node(MARKDOWN, "/", cache)
+            cache.save(path)
+            loaded = BlockCache.load(path)
+            self.assertEqual(loaded.entries, cache.entries)
+            markdown_to_html_node(MARKDOWN, "/", loaded)
+            self.assertEqual(loaded.stats()["misses"], 0)
+
+    def test_parallel_build_merges_worker_entries(self):
+        root = tempfile.mkdtemp()
+        try:
+            content = os.path.join(root, "content")
+            for name in ("a", "b", "c"):
+                os.makedirs(os.path.join(content, name))
+                with open(os.path.join(content, name, "index.md"), "w") as f:
+                    f.write(f"# {name}\n\nShared boilerplate paragraph")
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            cache = BlockCache()
+            build_site(content, template, os.path.join(root, "docs"), "/",
+                       manifest_path=os.path.join(root, "manifest.json"), workers=2, block_cache=cache)
+            self.assertIn(cache.key("Shared boilerplate paragraph", "/"), cache.entries)
+            self.assertEqual(cache.hits + cache.misses, 6)
+        finally:
+            shutil.rmtree(root)
+
+    def test_serial_build_keeps_no_added_entries(self):
+        root = tempfile.mkdtemp()
+        try:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("# Log\n\n" + "\n\n".join(f"Entry number {i}" for i in range(2000)))
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            cache = BlockCache(max_bytes=2000)
+            build_site(content, template, os.path.join(root, "docs"), "/",
+                       manifest_path=os.path.join(root, "manifest.json"), block_cache=cache)
+            self.assertLessEqual(cache.bytes, 2000)
+            self.assertEqual(len(cache._added), 0)
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from src.main import parse_args, main
+
+
+class TestCommandLine(unittest.TestCase): # Tests for the build/serve/clean/check subcommands
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root = tempfile.mkdtemp()
+        os.chdir(self.root)
+        self.write(os.path.join("pages", "index.md"), "# Home\n\n[about](/about) [gone](/missing)")
+        self.write(os.path.join("pages", "about.md"), "# About\n\nHello")
+        self.write(os.path.join("assets", "site.css"), "body {}")
+        self.write("layout.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def run_main(self, argv):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main(argv)
+        return out.getvalue()
+
+    def build(self):
+        return self.run_main(["build", "--content", "pages", "--template", "layout.html", "--static", "assets", "-o", "site"])
+
+    def test_build_is_the_default_command(self):
+        args = parse_args(["/blog/", "--full"])
+        self.assertEqual(args.command, "build")
+        self.assertEqual(args.basepath, "/blog/")
+        self.assertTrue(args.full)
+        self.assertFalse(args.watch)
+        self.assertEqual(parse_args([]).command, "build")
+        self.assertEqual(parse_args([]).output, "docs")
+
+    def test_serve_watches(self):
+        args = parse_args(["serve", "--port", "9000"])
+        self.assertTrue(args.watch)
+        self.assertEqual(args.port, 9000)
+
+    def test_build_options(self):
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join("site", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join("site", "about.html")))
+        self.assertTrue(os.path.exists(os.path.join("site", "site.css")))
+        with open(os.path.join("site", "about.html")) as f:
+            self.assertEqual(f.read(), "<title>About</title><div><h1>About</h1><p>Hello</p></div>")
+
+    def test_profile_bypasses_block_cache(self):
+        def profiled_nodes(*extra):
+            output = self.run_main(["build", "--content", "pages", "--template", "layout.html", "--static", "assets",
+                                    "-o", "site", "--full", "--profile", *extra])
+            return re.search(r"(\d+) nodes", output).group(1)
+
+        self.build() # Warm the block cache
+        self.assertEqual(profiled_nodes(), profiled_nodes("--no-block-cache"))
+
+    def test_check(self):
+        self.assertEqual(parse_args(["check"]).command, "check")
+        with self.assertRaises(SystemExit):
+            self.run_main(["check", "-o", "site"])
+        self.build()
+        with self.assertRaises(SystemExit) as raised:
+            self.run_main(["check", "-o", "site"])
+        self.assertEqual(raised.exception.code, 1)
+        os.remove(os.path.join("pages", "index.md"))
+        self.write(os.path.join("pages", "index.md"), "# Home\n\n[about](/about)")
+        self.build()
+        output = self.run_main(["check", "-o", "site"])
+        self.assertIn("Checked 2 pages, 0 broken references", output)
+
+    def test_clean(self):
+        self.build()
+        self.assertTrue(os.path.isdir(".cache"))
+        output = self.run_main(["clean", "-o", "site"])
+        self.assertIn("Removed site/", output)
+        self.assertFalse(os.path.exists("site"))
+        self.assertFalse(os.path.exists(".cache"))
+        self.assertTrue(os.path.exists(os.path.join("pages", "index.md")))
+
+    def test_fingerprint_rejected_for_shards(self):
+        for argv in (["--shard", "0/2", "--fingerprint"], ["--merge-shards", "2", "--fingerprint"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parse_args(argv)
+        self.assertEqual(parse_args(["--merge-shards", "2"]).merge_shards, 2)
+
+    def test_refuses_to_delete_sources(self):
+        for argv in (["clean", "-o", "."], ["clean", "-o", "content"], ["clean", "-o", ".."],
+                     ["build", "--full", "-o", "."], ["build", "--content", "site/pages", "--full", "-o", "site"],
+                     ["serve", "--full", "-o", "static"], ["build", "--template", "out/t.html", "--full", "-o", "out"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parse_args(argv)
+        self.assertEqual(parse_args(["clean", "-o", "site"]).output, "site")
+        self.assertEqual(parse_args(["build", "-o", "."]).output, ".")
+        self.run_main(["clean", "-o", "site", "--manifest", "pages"])
+        self.assertTrue(os.path.isdir("pages"))
+
+
+if __name__ == "__main__":
+    unittest.main()
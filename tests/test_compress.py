@@ -0,0 +1,56 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from src.compress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase): # Tests for the precompression build stage
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.write("index.html", "<p>hello</p>" * 200)
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "x" * 5000)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def compress(self):
+        return {os.path.relpath(r["path"], self.root): r for r in compress_outputs(self.root, ["gz"], min_size=100)}
+
+    def test_compresses_large_text_outputs_only(self):
+        reports = self.compress()
+        self.assertEqual(reports["index.html"]["status"], "compressed")
+        self.assertLess(reports["index.html"]["ratio"], 0.5)
+        self.assertEqual(reports["index.css"]["status"], "too small")
+        self.assertNotIn(os.path.join("images", "a.png"), reports)
+        with gzip.open(os.path.join(self.root, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 200)
+
+    def test_unchanged_outputs_not_recompressed(self):
+        self.compress()
+        self.assertEqual(self.compress()["index.html"]["status"], "unchanged")
+        self.write("index.html", "<p>changed</p>" * 200)
+        os.utime(os.path.join(self.root, "index.html"), ns=(1, 1))
+        self.assertEqual(self.compress()["index.html"]["status"], "compressed")
+
+    def test_orphans_removed(self):
+        self.compress()
+        os.remove(os.path.join(self.root, "index.html"))
+        self.compress()
+        self.assertFalse(os.path.exists(os.path.join(self.root, "index.html.gz")))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            compress_outputs(self.root, ["zip"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from benchmarks.corpus import SHAPES, generate_corpus, generate_page
+from benchmarks.run import latest_result
+from src.converts import markdown_to_html_node, extract_title
+
+
+class TestCorpus(unittest.TestCase): # Tests that the synthetic benchmark corpus is deterministic and renderable
+    def test_every_shape_renders(self):
+        for shape in SHAPES:
+            markdown = generate_page(random.Random(1), shape)
+            self.assertTrue(extract_title(markdown))
+            self.assertTrue(markdown_to_html_node(markdown).to_html())
+
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            paths_a = generate_corpus(a, pages=3, seed=7)
+            paths_b = generate_corpus(b, pages=3, seed=7)
+            for path_a, path_b in zip(paths_a, paths_b):
+                self.assertEqual(os.path.relpath(path_a, a), os.path.relpath(path_b, b))
+                with open(path_a) as fa, open(path_b) as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+
+    def test_latest_result_with_same_config(self):
+        with tempfile.TemporaryDirectory() as root:
+            for name, pages in (("20240101-000000", 50), ("20240102-000000", 50), ("20240103-000000", 10)):
+                with open(os.path.join(root, name + ".json"), "w") as f:
+                    json.dump({"config": {"pages": pages}, "results": {}}, f)
+            with mock.patch("benchmarks.run.RESULTS_DIR", root):
+                self.assertEqual(latest_result({"pages": 50}), os.path.join(root, "20240102-000000.json"))
+                self.assertEqual(latest_result({"pages": 10}), os.path.join(root, "20240103-000000.json"))
+                self.assertIsNone(latest_result({"pages": 99}))
+
+
+if __name__ == "__main__":
+    unittest.main()
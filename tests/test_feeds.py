@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site
+from src.pageindex import update_page_index
+from src.feeds import write_sitemaps, write_feed, sitemap_chunks, SITEMAP_HEADER, SITEMAP_FOOTER
+
+
+class TestSitemapAndFeed(unittest.TestCase): # Tests for the page metadata index and the outputs written from it
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHi")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Musings\n\nPosts")
+        self.write(os.path.join(self.content, "blog", "old", "index.md"), "---\ndate: 2020-01-01\n---\n# Old & <odd>")
+        self.write(os.path.join(self.content, "blog", "new", "index.md"),
+                   "---\ndate: 2024-05-01\ndescription: Fresh\n---\n# New")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def build(self, index=True):
+        stats = build_site(self.content, self.template, self.dest, "/", manifest_path=os.path.join(self.root, "manifest.json"),
+                           indexes=("pages",) if index else ())
+        if index:
+            return update_page_index(self.dest, stats["pages"], stats["removed_sources"], "/", "https://example.com",
+                                     state_path=os.path.join(self.root, "pages.json"), live=stats["refs"])
+
+    def test_index_holds_page_metadata(self):
+        pages = self.build()["pages"]
+        page = pages[os.path.join(self.content, "blog", "new", "index.md")]
+        self.assertEqual(page["title"], "New")
+        self.assertEqual(page["url"], "/blog/new/")
+        self.assertEqual(page["meta"], {"date": "2024-05-01", "description": "Fresh"})
+
+    def test_incremental_update(self):
+        self.assertTrue(self.build()["changed"])
+        state = self.build()
+        self.assertFalse(state["changed"])
+        self.assertEqual(len(state["pages"]), 4)
+        os.remove(os.path.join(self.content, "blog", "old", "index.md"))
+        state = self.build()
+        self.assertTrue(state["changed"])
+        self.assertEqual(len(state["pages"]), 3)
+
+    def test_index_catches_up_with_builds_without_it(self):
+        self.build(index=False)
+        self.assertEqual(len(self.build()["pages"]), 4)
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Ramblings\n\nPosts")
+        os.remove(os.path.join(self.content, "blog", "old", "index.md"))
+        self.build(index=False)
+        pages = self.build()["pages"]
+        self.assertEqual(sorted(page["title"] for page in pages.values()), ["Home", "New", "Ramblings"])
+
+    def test_whitespace_edit_after_unindexed_change(self):
+        blog = os.path.join(self.content, "blog", "index.md")
+        self.build()
+        self.write(blog, "# Ramblings\n\nPosts")
+        self.build(index=False)
+        self.write(blog, "# Ramblings\n\n\nPosts\n")
+        pages = self.build()["pages"]
+        self.assertEqual(pages[blog]["title"], "Ramblings")
+
+    def test_sitemap(self):
+        pages = self.build()["pages"]
+        self.assertEqual(write_sitemaps(pages, self.dest, "https://example.com"), 1)
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<url><loc>https://example.com/blog/new/</loc>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 4)
+        self.assertEqual(write_sitemaps(pages, self.dest, "https://example.com"), 0)
+
+    def test_sitemap_split_past_limits(self):
+        pages = self.build()["pages"]
+        write_sitemaps(pages, self.dest, "https://example.com", max_urls=3)
+        self.assertIn("<sitemap><loc>https://example.com/sitemap-2.xml</loc></sitemap>", self.read("sitemap.xml"))
+        self.assertEqual(self.read("sitemap-2.xml").count("<url>"), 1)
+        write_sitemaps(pages, self.dest, "https://example.com")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap-2.xml")))
+        max_bytes = len(SITEMAP_HEADER) + len(SITEMAP_FOOTER) + 25
+        self.assertEqual(sitemap_chunks(["a" * 10] * 3, max_bytes=max_bytes), [["a" * 10] * 2, ["a" * 10]])
+
+    def test_feed_newest_first(self):
+        write_feed(self.build()["pages"], self.dest, "https://example.com")
+        feed = self.read("feed.xml")
+        self.assertIn("<title>Musings</title>", feed)
+        self.assertLess(feed.index("<title>New</title>"), feed.index("<title>Old &amp; &lt;odd&gt;</title>"))
+        self.assertIn("<updated>2024-05-01T00:00:00Z</updated>", feed)
+        self.assertIn("<summary>Fresh</summary>", feed)
+        self.assertEqual(feed.count("<entry>"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
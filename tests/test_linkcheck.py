@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site
+from src.linkcheck import output_index, target_exists, broken_refs, validate_links
+
+
+class TestLinkValidation(unittest.TestCase): # Tests for checking link and image refs against the built site
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.dest, "images", "logo.png"), "png")
+        self.write(os.path.join(self.content, "index.md"),
+                   "# Home\n\n[post](/blog/post) [gone](/blog/missing) ![logo](/images/logo.png) ![x](/images/x.png)")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"),
+                   "# Post\n\n[home](/) [ext](https://example.com) [top](#top) [css](/index.css)")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        return build_site(self.content, self.template, self.dest, "/", manifest_path=os.path.join(self.root, "manifest.json"))
+
+    def test_target_exists(self):
+        index = {"index.html", "blog/post/index.html", "about.html", "images/logo.png"}
+        self.assertTrue(target_exists("", index))
+        self.assertTrue(target_exists("blog/post", index))
+        self.assertTrue(target_exists("blog/post/", index))
+        self.assertTrue(target_exists("about", index))
+        self.assertTrue(target_exists("images/logo.png", index))
+        self.assertFalse(target_exists("blog/", index))
+        self.assertFalse(target_exists("images/logo.jpg", index))
+
+    def test_external_and_anchor_refs_ignored(self):
+        refs = [("link", "https://example.com"), ("link", "#top"), ("link", "mailto:a@b.c"), ("link", "/x?y=1#z")]
+        self.assertEqual(broken_refs(refs, set()), [("link", "/x?y=1#z")])
+
+    def test_broken_refs_reported_per_page(self):
+        stats = self.build()
+        report = validate_links(stats["refs"], self.dest)
+        self.assertEqual(report, {
+            os.path.join(self.content, "blog", "post", "index.md"): [("link", "/index.css")],
+            os.path.join(self.content, "index.md"): [("link", "/blog/missing"), ("image", "/images/x.png")],
+        })
+
+    def test_skipped_pages_still_validated(self):
+        self.build()
+        os.remove(os.path.join(self.dest, "images", "logo.png"))
+        stats = self.build()
+        self.assertEqual(stats["rendered"], 0)
+        report = validate_links(stats["refs"], self.dest)
+        self.assertIn(("image", "/images/logo.png"), report[os.path.join(self.content, "index.md")])
+
+    def test_output_index(self):
+        self.build()
+        self.assertEqual(output_index(self.dest), {"index.html", "blog/post/index.html", "images/logo.png"})
+
+
+if __name__ == "__main__":
+    unittest.main()
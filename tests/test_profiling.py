@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src import converts, profiling
+from src.build import build_site
+
+
+class TestProfiler(unittest.TestCase): # Tests for per-stage build profiling
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(self.content)
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(self.content, "index.md"), "w") as f:
+            f.write("# Title\n\nSome **bold** text\n\n- a\n- b")
+
+    def tearDown(self):
+        profiling.disable()
+        shutil.rmtree(self.root)
+
+    def build(self):
+        build_site(self.content, self.template, os.path.join(self.root, "docs"), "/",
+                   manifest_path=os.path.join(self.root, "manifest.json"), force=True, workers=2)
+
+    def test_records_every_stage(self):
+        profiler = profiling.enable()
+        self.build()
+        self.assertEqual(len(profiler.pages), 1)
+        record = profiler.pages[0]
+        self.assertEqual(set(record["stages"]), set(profiling.STAGE_ORDER))
+        self.assertGreater(record["nodes"], 0)
+        self.assertGreater(record["bytes"], 0)
+        self.assertIn("ALL PAGES", profiler.report())
+
+    def test_disable_restores_original_functions(self):
+        original = converts.text_to_children
+        profiling.enable()
+        self.assertIsNot(converts.text_to_children, original)
+        profiling.disable()
+        self.assertIs(converts.text_to_children, original)
+        self.assertIsNone(profiling.active())
+
+
+if __name__ == "__main__":
+    unittest.main()
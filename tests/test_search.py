@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site
+from src.search import update_search_index, shard_key, page_url
+
+
+class TestSearchIndex(unittest.TestCase): # Tests for the incremental client-side search index
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Tolkien Home\n\nHobbits and **wizards**")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nWizards everywhere\n\n```\nelvish code\n```")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, search=True):
+        stats = build_site(self.content, self.template, self.dest, "/",
+                           manifest_path=os.path.join(self.root, "manifest.json"), collect_terms=search,
+                           indexes=("search",) if search else ())
+        if search:
+            return update_search_index(self.dest, stats["pages"], stats["removed_sources"], "/",
+                                       state_path=os.path.join(self.root, "search.json"), live=stats["refs"])
+
+    def lookup(self, term):
+        with open(os.path.join(self.dest, "search", "meta.json")) as f:
+            meta = json.load(f)
+        path = os.path.join(self.dest, "search", f"{shard_key(term)}.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            postings = json.load(f).get(term, [])
+        return [meta["pages"][str(page_id)][1] for page_id, _ in postings]
+
+    def test_shard_key_and_url(self):
+        self.assertEqual(shard_key("wizard"), "wi")
+        self.assertEqual(shard_key("élan"), "_")
+        self.assertEqual(page_url(os.path.join("docs", "blog", "index.html"), "docs", "/base/"), "/base/blog/")
+
+    def test_terms_indexed_with_title_boost(self):
+        self.build()
+        self.assertEqual(self.lookup("wizards"), ["/blog/", "/"])
+        self.assertEqual(self.lookup("tolkien"), ["/"])
+        self.assertEqual(self.lookup("elvish"), ["/blog/"])
+
+    def test_incremental_update_and_removal(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Tolkien Home\n\nDragons")
+        state = self.build()
+        self.assertEqual(self.lookup("hobbits"), [])
+        self.assertEqual(self.lookup("dragons"), ["/"])
+        self.assertEqual(self.lookup("wizards"), ["/blog/"])
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+        self.assertEqual(self.lookup("wizards"), [])
+        self.assertEqual(self.lookup("elvish"), [])
+
+    def test_missing_index_rebuilt_from_state(self):
+        self.build()
+        shutil.rmtree(os.path.join(self.dest, "search"))
+        self.build()
+        self.assertEqual(self.lookup("wizards"), ["/blog/", "/"])
+
+    def test_meta_untouched_when_unchanged(self):
+        self.build()
+        meta = os.path.join(self.dest, "search", "meta.json")
+        os.utime(meta, ns=(0, 0))
+        self.build()
+        self.assertEqual(os.stat(meta).st_mtime_ns, 0)
+        # Same title and the same terms, so the page list and the set of shards stay as they were.
+        self.write(os.path.join(self.content, "index.md"), "# Tolkien Home\n\nWizards and **hobbits**")
+        self.build()
+        self.assertEqual(os.stat(meta).st_mtime_ns, 0)
+        self.assertEqual(self.lookup("hobbits"), ["/"])
+
+    def test_search_enabled_on_existing_build(self):
+        self.build(search=False)
+        self.build()
+        self.assertEqual(self.lookup("wizards"), ["/blog/", "/"])
+
+    def test_catches_up_with_builds_without_search(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Shire Home\n\nDragons")
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build(search=False)
+        self.build()
+        with open(os.path.join(self.dest, "search", "meta.json")) as f:
+            self.assertEqual(list(json.load(f)["pages"].values()), [["Shire Home", "/"]])
+        self.assertEqual(self.lookup("dragons"), ["/"])
+        self.assertEqual(self.lookup("hobbits"), [])
+        self.assertEqual(self.lookup("wizards"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
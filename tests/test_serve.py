@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.assets import sync_assets
+from src.serve import Watcher, diff_snapshots
+
+
+class TestWatcher(unittest.TestCase): # Tests for watch-mode change detection and targeted rebuilds
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "other", "index.md"), "# Other")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.watcher = Watcher(self.content, self.static, self.template, self.dest)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
+
+    def test_diff_snapshots(self):
+        self.assertEqual(diff_snapshots({"a": (1, 1), "b": (1, 1)}, {"a": (2, 1), "c": (1, 1)}), (["a", "c"], ["b"]))
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.poll(), 0)
+
+    def test_content_change_renders_only_that_page(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home changed")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertIn("Home changed", self.read("index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "other", "index.html")))
+
+    def test_template_change_renders_all(self):
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.assertEqual(self.watcher.poll(), 2)
+        self.assertTrue(self.read("other", "index.html").startswith("<main>"))
+
+    def test_static_change_copies_asset(self):
+        self.write(os.path.join(self.static, "images", "new.png"), "png")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(self.read("images", "new.png"), "png")
+
+    def test_fingerprinted_assets(self):
+        self.write(self.template, '<link href="{{ BasePath }}index.css">{{ Content }}')
+        asset_manifest = os.path.join(self.root, "assets.json")
+        urls = sync_assets(self.static, self.dest, asset_manifest, fingerprint=True)["urls"]
+        watcher = Watcher(self.content, self.static, self.template, self.dest, fingerprint=True, asset_urls=urls,
+                          asset_manifest_path=asset_manifest)
+        self.write(self.template, '<link rel="stylesheet" href="{{ BasePath }}index.css">{{ Content }}')
+        self.assertEqual(watcher.poll(), 2)
+        self.assertIn(f'href="/{urls["index.css"]}"', self.read("other", "index.html"))
+
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(watcher.poll(), 3)
+        new_url = watcher.asset_urls["index.css"]
+        self.assertNotEqual(new_url, urls["index.css"])
+        self.assertEqual(self.read(new_url), "body { color: red }")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, urls["index.css"])))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css")))
+        self.assertIn(f'href="/{new_url}"', self.read("index.html"))
+
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![style](/index.css)")
+        self.assertEqual(watcher.poll(), 1)
+        self.assertIn(f'{new_url}" alt="style"', self.read("index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
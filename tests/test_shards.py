@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site, collect_pages
+from src.shards import assign_shards, hash_shard, merge_shards, save_shard_stats, shard_path
+
+
+class TestShardedBuild(unittest.TestCase): # Tests for building shards separately and merging them
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.shard_dir = os.path.join(self.root, "shards")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(8):
+            self.write(os.path.join(self.content, f"page{i}", "index.md"), f"# Page {i}\n\n" + "text " * (i * 50))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build_shards(self, count, strategy="hash"):
+        for index in range(count):
+            root = shard_path(self.shard_dir, index)
+            stats = build_site(self.content, self.template, os.path.join(root, "docs"), "/",
+                               manifest_path=os.path.join(root, "manifest.json"), collect_terms=True,
+                               shard=(index, count), shard_strategy=strategy)
+            save_shard_stats(root, stats)
+        return merge_shards(self.shard_dir, count, self.dest)
+
+    def outputs(self, directory):
+        result = {}
+        for src, dest in collect_pages(self.content, directory):
+            with open(dest) as f:
+                result[os.path.relpath(dest, directory)] = f.read()
+        return result
+
+    def test_assignment_is_deterministic_partition(self):
+        jobs = collect_pages(self.content, self.dest)
+        for strategy in ("hash", "size"):
+            shards = assign_shards(jobs, self.content, 3, strategy)
+            self.assertEqual(shards, assign_shards(jobs, self.content, 3, strategy))
+            self.assertEqual(set(shards), {src for src, _ in jobs})
+            self.assertTrue(all(0 <= index < 3 for index in shards.values()))
+        self.assertEqual(hash_shard(os.path.join("a", "b.md"), 7), hash_shard("a/b.md", 7))
+
+    def test_size_strategy_balances_bytes(self):
+        jobs = collect_pages(self.content, self.dest)
+        loads = [0, 0]
+        for src, index in assign_shards(jobs, self.content, 2, "size").items():
+            loads[index] += os.path.getsize(src)
+        self.assertLess(abs(loads[0] - loads[1]), max(os.path.getsize(src) for src, _ in jobs))
+
+    def test_merged_output_matches_single_build(self):
+        single = os.path.join(self.root, "single")
+        build_site(self.content, self.template, single, "/", manifest_path=os.path.join(self.root, "manifest.json"))
+        stats = self.build_shards(3, "size")
+        self.assertEqual(self.outputs(self.dest), self.outputs(single))
+        self.assertEqual(stats["rendered"], 8)
+        self.assertEqual(len(stats["refs"]), 8)
+        self.assertEqual(stats["pages"][os.path.join(self.content, "page1", "index.md")]["dest"],
+                         os.path.join(self.dest, "page1", "index.html"))
+
+    def test_incremental_merge(self):
+        self.build_shards(3)
+        self.write(os.path.join(self.content, "page1", "index.md"), "# Changed")
+        os.remove(os.path.join(self.content, "page2", "index.md"))
+        stats = self.build_shards(3)
+        self.assertEqual(list(stats["pages"]), [os.path.join(self.content, "page1", "index.md")])
+        self.assertEqual(stats["removed_sources"], [os.path.join(self.content, "page2", "index.md")])
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "page2", "index.html")))
+
+    def test_changing_shard_count_keeps_every_page(self):
+        self.build_shards(2)
+        stats = self.build_shards(3)
+        self.assertEqual(len(self.outputs(self.dest)), 8)
+        self.assertEqual(stats["removed_sources"], [])
+
+    def test_unbuilt_shard_is_an_error(self):
+        with self.assertRaises(FileNotFoundError):
+            merge_shards(self.shard_dir, 2, self.dest)
+
+
+if __name__ == "__main__":
+    unittest.main()
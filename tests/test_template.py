@@ -0,0 +1,54 @@
+import io
+import os
+import tempfile
+import unittest
+from src.template import Template, load_template
+from src.converts import render_page, parse_front_matter
+from src.nodes import LeafNode
+
+
+class TestTemplate(unittest.TestCase): # Tests for the compiled template engine
+    def test_segments(self):
+        template = Template("<t>{{ Title }}</t>{{Content}}")
+        self.assertEqual(template.segments, [(False, "<t>"), (True, "Title"), (False, "</t>"), (True, "Content")])
+
+    def test_render_and_write_agree(self):
+        template = Template("<p>{{ Content }}</p>{{ Author }}")
+        context = {"Content": LeafNode("b", "hi"), "Author": "Tolkien"}
+        out = io.StringIO()
+        template.write(out, context)
+        self.assertEqual(out.getvalue(), "<p><b>hi</b></p>Tolkien")
+        self.assertEqual(template.render(context), "<p><b>hi</b></p>Tolkien")
+
+    def test_unknown_placeholder_left_alone(self):
+        self.assertEqual(Template("a {{ Missing }} b").render({}), "a {{ Missing }} b")
+
+    def test_load_template_cached_until_modified(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual(load_template(path).render({"Title": "x"}), "<h1>x</h1>")
+
+
+class TestFrontMatter(unittest.TestCase): # Tests for front matter parsing and template variables
+    def test_parse_front_matter(self):
+        meta, body = parse_front_matter("---\nauthor: Tolkien\ndate: \"1954\"\n---\n# Title")
+        self.assertEqual(meta, {"author": "Tolkien", "date": "1954"})
+        self.assertEqual(body, "# Title")
+
+    def test_no_front_matter(self):
+        self.assertEqual(parse_front_matter("# Title\n---"), ({}, "# Title\n---"))
+
+    def test_front_matter_variables_rendered(self):
+        html = render_page("---\nauthor: Tolkien\n---\n# Hi", "{{ Title }} by {{ author }}", "/")
+        self.assertEqual(html, "Hi by Tolkien")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,16 @@
+import io
+import os
+import random
 import re
+import tempfile
+import textwrap
 import unittest
-from src.splits import split_nodes_image, split_nodes_link, split_nodes_delimiter, extract_markdown_images, extract_markdown_links
-from src.nodes import HTMLNode, LeafNode, ParentNode, TextNode, TextType
-from src.converts import markdown_to_blocks, markdown_to_html_node, extract_title
-from src.blocknode import BlockType, block_to_block_type
+from unittest import mock
+from src import converts
+from src.splits import split_nodes_image, split_nodes_link, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, tokenize_inline
+from src.nodes import HTMLNode, LeafNode, ParentNode, RawHTMLNode, TextNode, TextType, escape_text, escape_attribute
+from src.converts import markdown_to_blocks, markdown_to_html_node, extract_title, render_page
+from src.blocknode import BlockType, block_to_block_type, scan_blocks
 
 
 
@@ -37,6 +44,16 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode()
         self.assertEqual(node.props_to_html(), "")
         
+    def test_empty_children_and_props_are_shared(self): # Test that nodes without children or props don't allocate them
+        first, second = LeafNode("b", "x"), LeafNode("i", "y")
+        self.assertIs(first.props, second.props)
+        self.assertIs(first.children, second.children)
+        self.assertEqual(len(first.props), 0)
+        with self.assertRaises(TypeError):
+            first.props["href"] = "/x"
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertFalse(hasattr(TextNode("t", TextType.TEXT), "__dict__"))
+
     def test_leafnode(self): # Test for LeafNode initialization
         node = HTMLNode("p", "HELLO WORLD", [], {"class": "greeting"})
         self.assertEqual(node.tag, "p")
@@ -234,6 +251,196 @@ class TestMarkdownToHtmlNode(unittest.TestCase): # Test for converting markdown
         self.assertEqual(node.children[0].children[0].tag, "code")
 
 
+def chained_split(text): # The original multi-pass inline pipeline, used as the reference for tokenize_inline.
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return nodes
+
+
+class TestTokenizeInline(unittest.TestCase): # Test that the single-pass tokenizer matches the chained split passes
+    def assertSameAsChained(self, text):
+        try:
+            expected = chained_split(text)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                tokenize_inline(text)
+            return
+        self.assertEqual(tokenize_inline(text), expected, text)
+
+    def test_mixed_markup(self):
+        text = "This is **bold** and *it* or _it_ with `code`, ![img](/a.png) and [link](/b)"
+        self.assertEqual(tokenize_inline(text), [
+            TextNode("This is ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("it", TextType.ITALIC),
+            TextNode(" or ", TextType.TEXT),
+            TextNode("it", TextType.ITALIC),
+            TextNode(" with ", TextType.TEXT),
+            TextNode("code", TextType.CODE),
+            TextNode(", ", TextType.TEXT),
+            TextNode("img", TextType.IMAGE, "/a.png"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "/b"),
+        ])
+        self.assertSameAsChained(text)
+
+    def test_empty_and_plain(self):
+        self.assertEqual(tokenize_inline(""), [])
+        self.assertSameAsChained("plain text")
+
+    def test_unmatched_delimiter_raises(self):
+        with self.assertRaises(ValueError):
+            tokenize_inline("an *unmatched delimiter")
+
+    def test_overlapping_link_and_image(self):
+        self.assertSameAsChained("[x![y](z) tail [a](b)")
+
+    def test_random_inputs_match_chained(self):
+        rng = random.Random(1234)
+        pieces = ["word ", "**", "*", "_", "`", "![alt](/i.png)", "[txt](/u)", "[", "]", "(", ")", "!", " "]
+        for _ in range(2000):
+            self.assertSameAsChained("".join(rng.choice(pieces) for _ in range(rng.randint(0, 12))))
+
+
+class TestStreamingRender(unittest.TestCase): # Test for streaming HTML serialization
+    def test_write_html_matches_to_html(self):
+        node = markdown_to_html_node("# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n\n```\ncode\n```", "/base/")
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_render_page_fills_template(self):
+        html = render_page("# Hi\n\ntext", "<t>{{ Title }}</t><a href=\"{{ BasePath }}x\">{{ Content }}</a>", "/b/")
+        self.assertEqual(html, '<t>Hi</t><a href="/b/x"><div><h1>Hi</h1><p>text</p></div></a>')
+
+
+class TestEscaping(unittest.TestCase): # Test escaping in the HTML serializer
+    def test_escape_functions(self):
+        plain = "nothing to see"
+        self.assertIs(escape_text(plain), plain)
+        self.assertEqual(escape_text('a < b & "c" > d'), 'a &lt; b &amp; "c" &gt; d')
+        self.assertEqual(escape_attribute('say "hi" & <bye>'), "say &quot;hi&quot; &amp; &lt;bye&gt;")
+        self.assertEqual(escape_attribute(3), "3")
+
+    def test_leaf_value_and_props_escaped(self):
+        self.assertEqual(LeafNode("code", "if a < b && c:").to_html(), "<code>if a &lt; b &amp;&amp; c:</code>")
+        self.assertEqual(LeafNode("a", "x", {"href": '/q?a=1&b="2"'}).to_html(), '<a href="/q?a=1&amp;b=&quot;2&quot;">x</a>')
+        self.assertEqual(LeafNode("img", None, {"alt": "<logo>"}).to_html(), '<img alt="&lt;logo&gt;" />')
+
+    def test_raw_html_not_escaped(self):
+        node = ParentNode("div", [RawHTMLNode("<p>a &amp; b</p>"), LeafNode(None, "<p>")])
+        self.assertEqual(node.to_html(), "<div><p>a &amp; b</p>&lt;p&gt;</div>")
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_markdown_escaped_once_with_block_cache(self):
+        from src.cache import BlockCache
+        cache = BlockCache()
+        markdown = "# A & B\n\n[< Back](/)\n\n```\n<div>\n```"
+        expected = '<div><h1>A &amp; B</h1><p><a href="//">&lt; Back</a></p><pre><code>&lt;div&gt;</code></pre></div>'
+        self.assertEqual(markdown_to_html_node(markdown).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, "/", cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, "/", cache).to_html(), expected)
+
+    def test_title_escaped_in_template(self):
+        self.assertEqual(render_page("# A & B", "<title>{{ Title }}</title>"), "<title>A &amp; B</title>")
+
+
+class TestLargeSources(unittest.TestCase): # Test that streamed large sources render exactly like in-memory ones
+    DOCUMENTS = [
+        "# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n\n```\ncode\n```\n",
+        "---\ntitle: Front\nauthor: me\n---\n\n  Intro text\n  more\n\n## Sub\n\n# Real title\n",
+        "---\nnot closed\n\n# Title\n\n> quote\n> more",
+        "\n\n   # Indented title\n    still the heading block\n\n1. one\n2. two\n\n\n",
+    ]
+    TEMPLATE = "<t>{{ Title }}</t>{{ author }}{{ Content }}"
+
+    def generate(self, text, streamed):
+        with tempfile.TemporaryDirectory() as root:
+            src = os.path.join(root, "page.md")
+            dest = os.path.join(root, "out", "page.html")
+            with open(src, "w") as f:
+                f.write(text)
+            with mock.patch.object(converts, "LARGE_SOURCE_SIZE", 0 if streamed else 1 << 40):
+                info = converts.generate_page(src, None, dest, "/b/", template=self.TEMPLATE, collect_terms=True)
+            info.pop("output_key", None) # Only in-memory sources get an output cache key
+            with open(dest) as f:
+                html = f.read()
+        return html, info
+
+    def test_streamed_matches_in_memory(self):
+        for text in self.DOCUMENTS:
+            with self.subTest(text=text):
+                self.assertEqual(self.generate(text, True), self.generate(text, False))
+
+    def test_title_read_without_scanning_whole_file(self):
+        lines = iter(["intro", "# Title", "rest"])
+        self.assertEqual(converts.title_from_lines(lines), "Title")
+        self.assertEqual(list(lines), ["rest"])
+
+    def test_blocks_are_yielded_lazily(self):
+        def lines():
+            yield "first block"
+            yield ""
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(converts.iter_block_lines(lines())), ["first block"])
+
+
+def legacy_blocks(markdown): # The original regex splitter and classifier, used as the reference for scan_blocks.
+    blocks = re.split(r'\n\s*\n', markdown.strip())
+    blocks = [textwrap.dedent(block).strip() for block in blocks if block.strip()]
+    types = []
+    for block in blocks:
+        lines = block.split("\n")
+        if block.startswith("```") and block.endswith("```"):
+            types.append(BlockType.CODE)
+        elif all(line.strip().startswith(">") for line in lines if line.strip()):
+            types.append(BlockType.BLOCKQUOTE)
+        elif all(re.match(r"-\s", line) for line in lines):
+            types.append(BlockType.UNORDERED_LIST)
+        elif all(re.match(rf"{i+1}\.\s", line) for i, line in enumerate(lines)):
+            types.append(BlockType.ORDERED_LIST)
+        elif re.match(r"^#{1,6} ", lines[0]):
+            types.append(BlockType.HEADING)
+        else:
+            types.append(BlockType.PARAGRAPH)
+    return list(zip(types, blocks))
+
+
+class TestScanBlocks(unittest.TestCase): # Test that the line scanner splits and classifies like the regex version
+    def test_classified_blocks(self):
+        md = "# Title\n\n- a\n- b\n\n1. x\n2. y\n\n> q\n\n```\ncode\n```\n\ntext"
+        self.assertEqual([block_type for block_type, _ in scan_blocks(md)], [
+            BlockType.HEADING, BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST,
+            BlockType.BLOCKQUOTE, BlockType.CODE, BlockType.PARAGRAPH,
+        ])
+        self.assertEqual(scan_blocks(md)[1][1], ["- a", "- b"])
+
+    def test_block_to_block_type_edge_cases(self):
+        self.assertEqual(block_to_block_type("####### seven"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("-No space"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("1. a\n3. b"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("9. a\n10. b"), BlockType.PARAGRAPH)
+
+    def test_random_documents_match_legacy(self):
+        rng = random.Random(99)
+        lines = ["", " ", "\t", "  \t ", "# h", "###### h6", "####### h7", "#nospace", "- item", "-x", "1. one",
+                 "2. two", "3.three", "> quote", "  > indented quote", "```", "```py", "code```", "text",
+                 "    indented text", "\ttabbed", "  two spaces", "a\r", "- "]
+        for _ in range(3000):
+            md = "\n".join(rng.choice(lines) for _ in range(rng.randint(0, 10)))
+            expected = legacy_blocks(md)
+            actual = [(block_type, "\n".join(block_lines)) for block_type, block_lines in scan_blocks(md)]
+            self.assertEqual(actual, expected, repr(md))
+
+
 class TestExtractTitle(unittest.TestCase): # Test for extracting title from markdown
     def test_extract_valid_title(self):
         md = "# Hello World"
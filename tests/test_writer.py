@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.build import build_site
+from src.writer import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase): # Tests for the background output writer
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_writes_and_skips_identical(self):
+        with OutputWriter(threads=2, max_pending=2) as writer:
+            for i in range(10):
+                writer.submit(self.path("d", f"{i}.html"), b"page")
+        self.assertEqual(writer.written, 10)
+        mtime = os.stat(self.path("d", "0.html")).st_mtime_ns
+        with OutputWriter() as writer:
+            writer.submit(self.path("d", "0.html"), b"page")
+            writer.submit(self.path("d", "1.html"), b"changed")
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+        self.assertEqual(os.stat(self.path("d", "0.html")).st_mtime_ns, mtime)
+
+    def test_fsync_batches_commit_every_file(self):
+        writer = OutputWriter(threads=1, fsync=True, fsync_batch=3)
+        for i in range(7):
+            writer.submit(self.path(f"{i}.html"), str(i).encode())
+        self.assertEqual(writer.close(), [])
+        self.assertEqual(writer.written, 7)
+        self.assertFalse([name for name in os.listdir(self.root) if name.endswith(".tmp")])
+
+    def test_errors_reported(self):
+        os.makedirs(self.path("blocked.html"))
+        writer = OutputWriter()
+        writer.submit(self.path("blocked.html"), b"x")
+        self.assertEqual([path for path, _ in writer.close()], [self.path("blocked.html")])
+        self.assertFalse(os.path.exists(self.path("blocked.html.tmp")))
+
+    def test_build_with_writer_matches_inline(self):
+        content = self.path("content")
+        os.makedirs(os.path.join(content, "a"))
+        with open(os.path.join(content, "a", "index.md"), "w") as f:
+            f.write("# A\n\ntext")
+        with open(os.path.join(content, "index.md"), "w") as f:
+            f.write("# Home\n\n[a](/a)")
+        template = self.path("template.html")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        outputs = {}
+        for name, kwargs in (("inline", {}), ("serial", {"writer_threads": 2}), ("pool", {"writer_threads": 2, "workers": 2})):
+            dest = self.path(name)
+            build_site(content, template, dest, "/", manifest_path=self.path(name + ".json"), **kwargs)
+            with open(os.path.join(dest, "a", "index.html")) as f, open(os.path.join(dest, "index.html")) as g:
+                outputs[name] = (f.read(), g.read())
+        self.assertEqual(outputs["serial"], outputs["inline"])
+        self.assertEqual(outputs["pool"], outputs["inline"])
+
+
+if __name__ == "__main__":
+    unittest.main()